@@ -271,7 +271,10 @@ async def run_prediction_generation(target_date: datetime):
     
     # 2. Extract fixture IDs for the date (this replaces the unified data files approach)
     extractor = DailyDataPreparer()
-    fixture_ids_for_prediction = extractor.extract_fixture_ids_for_date(date_str)
+    try:
+        fixture_ids_for_prediction = extractor.extract_fixture_ids_for_date(date_str)
+    finally:
+        extractor.close()
     
     if not fixture_ids_for_prediction:
         logger.warning("No fixture IDs found for prediction generation.")
@@ -13,6 +13,16 @@ os.environ['NUMEXPR_MAX_THREADS'] = '12'
 
 logger = logging.getLogger(__name__)
 
+# Connection options shared by every client of the deployment (see MongoDBManager.get_client_settings)
+MONGO_CLIENT_OPTIONS: Dict[str, Any] = {
+    "serverSelectionTimeoutMS": 15000,
+    "connectTimeoutMS": 15000,
+    "socketTimeoutMS": 60000,
+    "maxPoolSize": 50,
+    "appname": "Alpha-ML",
+    "tls": False,
+}
+
 class MongoDBManager:
     _instance = None
     _client: Optional[MongoClient] = None
@@ -64,15 +74,7 @@ class MongoDBManager:
             try:
                 retry_count += 1
                 logger.info(f"Attempting to connect to MongoDB (attempt {retry_count}/{self._max_retries})...")
-                self._client = MongoClient(
-                    mongo_uri,
-                    serverSelectionTimeoutMS=15000,
-                    connectTimeoutMS=15000,
-                    socketTimeoutMS=60000,
-                    maxPoolSize=50,
-                    appname="Alpha-ML",
-                    tls=False,
-                )
+                self._client = MongoClient(mongo_uri, **MONGO_CLIENT_OPTIONS)
                 self._client.admin.command('ping')
                 logger.info(f"Successfully connected to MongoDB server")
 
@@ -528,6 +530,44 @@ class MongoDBManager:
 
         return self._odds_collection.find_one({'_id': fixture_id})
 
+    def get_odds_for_bookmaker(self, fixture_id: str, bookmaker_name: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Returns only the named bookmaker's 'bets' list for a fixture, filtered server-side.
+        Odds documents store the raw API response under 'bookmakers', each entry holding its own 'bookmakers' list.
+        """
+        assert self._initialized and self._odds_collection is not None, "DB not initialized or odds collection missing"
+        assert isinstance(fixture_id, str) and fixture_id, "Fixture ID must be a non-empty string"
+
+        pipeline = [
+            {'$match': {'_id': fixture_id}},
+            {'$unwind': '$bookmakers'},
+            {'$unwind': '$bookmakers.bookmakers'},
+            {'$match': {'bookmakers.bookmakers.name': bookmaker_name}},
+            {'$limit': 1},
+            {'$project': {'_id': 0, 'bets': '$bookmakers.bookmakers.bets'}},
+        ]
+        for doc in self._odds_collection.aggregate(pipeline):
+            return doc.get('bets', [])
+        return None
+
+    def get_odds_for_bookmaker_bulk(self, fixture_ids: List[str], bookmaker_name: str) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Batch variant of get_odds_for_bookmaker: one $in aggregation for many fixtures.
+        Returns {fixture_id: bets}; fixtures without odds for the bookmaker are absent.
+        """
+        assert self._initialized and self._odds_collection is not None, "DB not initialized or odds collection missing"
+        if not fixture_ids:
+            return {}
+
+        pipeline = [
+            {'$match': {'_id': {'$in': list(fixture_ids)}}},
+            {'$unwind': '$bookmakers'},
+            {'$unwind': '$bookmakers.bookmakers'},
+            {'$match': {'bookmakers.bookmakers.name': bookmaker_name}},
+            {'$group': {'_id': '$_id', 'bets': {'$first': '$bookmakers.bookmakers.bets'}}},
+        ]
+        return {doc['_id']: doc.get('bets') or [] for doc in self._odds_collection.aggregate(pipeline)}
+
     def save_standings_data(self, date_str: str, league_id: str, season: int, standings_payload: Dict[str, Any]) -> bool:
         """Saves or updates a snapshot of league standings for a specific date."""
         assert self._initialized and self._standings_collection is not None, "DB not initialized"
@@ -1153,6 +1193,20 @@ class MongoDBManager:
         """Checks if the database manager is properly initialized."""
         return self._initialized and self._client is not None and self._db is not None
 
+    def get_database_name(self) -> str:
+        """Returns the name of the database this manager is connected to."""
+        assert self._initialized and self._db is not None, "DB not initialized"
+        return self._db.name
+
+    def get_client_settings(self) -> Tuple[str, Dict[str, Any]]:
+        """
+        Returns the URI and client options this manager connects with, so other
+        clients of the same deployment (e.g. Motor) are configured identically.
+        """
+        mongo_uri = os.getenv("MONGO_URI")
+        assert mongo_uri, "MONGO_URI environment variable is required and must be set in .env"
+        return mongo_uri, dict(MONGO_CLIENT_OPTIONS)
+
     def save_match_result(self, result_data: Dict[str, Any]) -> bool:
         """
         Saves a match result to the 'match_results' collection.
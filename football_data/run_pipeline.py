@@ -346,35 +346,38 @@ async def main():
     extractor = DailyDataPreparer()
     unified_files_to_predict = []
     
-    # We can run extraction for today and tomorrow again
-    # It will find the newly processed data
-    for i in range(2):
-        target_date = datetime.now() + timedelta(days=i)
-        date_str = target_date.strftime('%Y-%m-%d')
-        logger.info(f"Extracting unified data for {date_str}")
+    try:
+        # We can run extraction for today and tomorrow again
+        # It will find the newly processed data
+        for i in range(2):
+            target_date = datetime.now() + timedelta(days=i)
+            date_str = target_date.strftime('%Y-%m-%d')
+            logger.info(f"Extracting unified data for {date_str}")
         
-        # This process finds all fixtures for the date, processes them, and saves individual files
-        # It returns a summary of what it did.
-        extraction_summary = await extractor.extract_games(target_date)
+            # This process finds all fixtures for the date, processes them, and saves individual files
+            # It returns a summary of what it did.
+            extraction_summary = await extractor.extract_games(target_date)
         
-        # We need to find the files it created for the fixtures we just processed.
-        if "games_processed_summary" in extraction_summary:
-            for summary in extraction_summary["games_processed_summary"]:
-                fixture_id = summary.get("fixture_id")
-                if fixture_id in processed_fixture_ids:
-                    # Construct the expected filename to find the file
-                    # This logic must match the save logic in `save_individual_game_file`
-                    match_data = db_manager.get_match_data(str(fixture_id))
-                    if match_data:
-                        home_name = extractor._sanitize_filename(match_data.get('home_team',{}).get('name', ''))
-                        away_name = extractor._sanitize_filename(match_data.get('away_team',{}).get('name', ''))
-                        fname = f"{date_str}_{home_name}_vs_{away_name}_{fixture_id}.json"
-                        fpath = os.path.join(extractor.OUTPUT_DIR, fname)
-                        if os.path.exists(fpath):
-                            unified_files_to_predict.append(fpath)
-                        else:
-                            logger.warning(f"Could not find expected unified file: {fpath}")
-    
+            # We need to find the files it created for the fixtures we just processed.
+            if "games_processed_summary" in extraction_summary:
+                for summary in extraction_summary["games_processed_summary"]:
+                    fixture_id = summary.get("fixture_id")
+                    if fixture_id in processed_fixture_ids:
+                        # Construct the expected filename to find the file
+                        # This logic must match the save logic in `save_individual_game_file`
+                        match_data = db_manager.get_match_data(str(fixture_id))
+                        if match_data:
+                            home_name = extractor._sanitize_filename(match_data.get('home_team',{}).get('name', ''))
+                            away_name = extractor._sanitize_filename(match_data.get('away_team',{}).get('name', ''))
+                            fname = f"{date_str}_{home_name}_vs_{away_name}_{fixture_id}.json"
+                            fpath = os.path.join(extractor.OUTPUT_DIR, fname)
+                            if os.path.exists(fpath):
+                                unified_files_to_predict.append(fpath)
+                            else:
+                                logger.warning(f"Could not find expected unified file: {fpath}")
+    finally:
+        extractor.close() # Release the async Mongo client; the shared db_manager stays open
+
     logger.info(f"Found {len(unified_files_to_predict)} unified files to run predictions on.")
 
     if not unified_files_to_predict:
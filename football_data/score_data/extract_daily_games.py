@@ -1,6 +1,6 @@
 import logging
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import asyncio
 import argparse
 import sys
@@ -31,12 +31,30 @@ except ImportError as e:
     print("or that the project structure is correct.")
     sys.exit(1)
 
+# Motor is optional; without it async callers fall back to the sync manager on a worker thread
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+    MOTOR_AVAILABLE = True
+except ImportError:
+    AsyncIOMotorClient = None
+    MOTOR_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
 # Directory to save the final unified data
 UNIFIED_DATA_DIR = os.path.join(football_data_root, "data", "unified_data")
 
+# Unified files are machine-consumed; set UNIFIED_PRETTY=1 to pretty-print them for debugging
+UNIFIED_PRETTY = os.environ.get("UNIFIED_PRETTY", "").strip().lower() in ("1", "true", "yes")
+
+
+class _DateTimeEncoder(json.JSONEncoder):
+    """Custom JSON encoder to handle datetime objects."""
+    def default(self, obj):
+        if isinstance(obj, datetime):
+            return obj.isoformat()
+        return super(_DateTimeEncoder, self).default(obj)
+
 
 class DailyDataPreparer:
     """
@@ -55,6 +73,8 @@ class DailyDataPreparer:
         
         # Initialize database manager
         self.db_manager = MongoDBManager()
+        # Async client is created lazily inside the running event loop
+        self.async_client = None
         
         # We need these components to process the data
         self.fixture_details_fetcher = FixtureDetailsFetcher(db_manager_instance=self.db_manager)
@@ -62,6 +82,15 @@ class DailyDataPreparer:
         # Set OUTPUT_DIR for compatibility with pipeline files
         self.OUTPUT_DIR = UNIFIED_DATA_DIR
 
+    def close(self):
+        """
+        Closes the Motor client if one was created. The shared sync MongoDBManager is
+        left open; its owner closes it with close_connection().
+        """
+        if self.async_client is not None:
+            self.async_client.close()
+            self.async_client = None
+
     def extract_fixture_ids_for_date(self, date_str: str) -> List[int]:
         """
         Extracts all fixture IDs for a specific date from the 'daily_games' collection.
@@ -69,32 +98,65 @@ class DailyDataPreparer:
         logger.info(f"Extracting fixture IDs for date: {date_str}")
         try:
             games_data = self.db_manager.get_daily_games(date_str)
+            return self._fixture_ids_from_games_data(games_data, date_str)
 
-            if not games_data or not games_data.get("leagues"):
-                logger.warning(f"No games data found in MongoDB for date {date_str}")
-                return []
-
-            fixture_ids = []
-            for league_id, league_info in games_data.get("leagues", {}).items():
-                for match in league_info.get("matches", []):
-                    fixture_id = match.get("id")
-                    if fixture_id:
-                        try:
-                            fixture_ids.append(int(fixture_id))
-                        except (ValueError, TypeError):
-                            logger.warning(f"Could not convert fixture ID '{fixture_id}' to int. Skipping.")
+        except Exception as e:
+            logger.error(f"Error getting fixtures from MongoDB: {e}", exc_info=True)
+            return []
 
-            unique_fixture_ids = sorted(list(set(fixture_ids)))
-            logger.info(f"Found {len(unique_fixture_ids)} unique fixture IDs for {date_str}.")
-            return unique_fixture_ids
+    async def aextract_fixture_ids_for_date(self, date_str: str) -> List[int]:
+        """
+        Async variant of extract_fixture_ids_for_date that does not block the event loop.
+        """
+        logger.info(f"Extracting fixture IDs for date: {date_str}")
+        try:
+            games_data = await self._aget_daily_games(date_str)
+            return self._fixture_ids_from_games_data(games_data, date_str)
 
         except Exception as e:
             logger.error(f"Error getting fixtures from MongoDB: {e}", exc_info=True)
             return []
 
-    async def prepare_data_for_date(self, date_str: str, force_reprocess: bool = False):
+    async def _aget_daily_games(self, date_str: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetches the 'daily_games' document via Motor, or via the sync manager on a thread.
+        """
+        if not MOTOR_AVAILABLE:
+            return await asyncio.to_thread(self.db_manager.get_daily_games, date_str)
+
+        if self.async_client is None:
+            mongo_uri, client_options = self.db_manager.get_client_settings()
+            self.async_client = AsyncIOMotorClient(mongo_uri, **client_options)
+        async_db = self.async_client[self.db_manager.get_database_name()]
+        return await async_db['daily_games'].find_one({"_id": date_str})
+
+    def _fixture_ids_from_games_data(self, games_data: Optional[Dict[str, Any]], date_str: str) -> List[int]:
+        """
+        Collects the sorted unique fixture IDs from a 'daily_games' document.
+        """
+        if not games_data or not games_data.get("leagues"):
+            logger.warning(f"No games data found in MongoDB for date {date_str}")
+            return []
+
+        fixture_ids = []
+        for league_id, league_info in games_data.get("leagues", {}).items():
+            for match in league_info.get("matches", []):
+                fixture_id = match.get("id")
+                if fixture_id:
+                    try:
+                        fixture_ids.append(int(fixture_id))
+                    except (ValueError, TypeError):
+                        logger.warning(f"Could not convert fixture ID '{fixture_id}' to int. Skipping.")
+
+        unique_fixture_ids = sorted(list(set(fixture_ids)))
+        logger.info(f"Found {len(unique_fixture_ids)} unique fixture IDs for {date_str}.")
+        return unique_fixture_ids
+
+    async def prepare_data_for_date(self, date_str: str, force_reprocess: bool = False) -> Dict[str, Any]:
         """
         Main orchestration method to prepare all data for a given date.
+        Returns the fixture IDs for the date and the output paths that were
+        written, skipped (already on disk) or failed.
         """
         logger.info(f"--- Starting Daily Data Preparation for {date_str} ---")
         
@@ -102,24 +164,33 @@ class DailyDataPreparer:
         os.makedirs(UNIFIED_DATA_DIR, exist_ok=True)
 
         # Step 1: Extract fixture IDs
-        fixture_ids = self.extract_fixture_ids_for_date(date_str)
+        fixture_ids = await self.aextract_fixture_ids_for_date(date_str)
+        run_summary: Dict[str, Any] = {"fixture_ids": fixture_ids, "written": [], "skipped": [], "failed": []}
 
         if not fixture_ids:
             logger.warning(f"No fixtures to process for {date_str}.")
-            return
+            return run_summary
 
-        processed_count = 0
-        skipped_count = 0
-        failed_count = 0
+        # Index existing unified files with a single directory read instead of stat-ing each path
+        prefix, suffix = "unified_fixture_", ".json"
+        existing_files = {}
+        with os.scandir(UNIFIED_DATA_DIR) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith(prefix) and name.endswith(suffix):
+                    try:
+                        existing_files[int(name[len(prefix):-len(suffix)])] = entry
+                    except ValueError:
+                        continue
 
         # Step 2: Process each fixture
         for fixture_id in fixture_ids:
             output_path = os.path.join(UNIFIED_DATA_DIR, f"unified_fixture_{fixture_id}.json")
             
             # Skip if already processed unless force is True
-            if os.path.exists(output_path) and not force_reprocess:
+            if fixture_id in existing_files and not force_reprocess:
                 logger.info(f"Skipping fixture {fixture_id}; unified file already exists.")
-                skipped_count += 1
+                run_summary["skipped"].append((fixture_id, output_path))
                 continue
 
             logger.info(f"--- Processing fixture {fixture_id} ---")
@@ -129,31 +200,28 @@ class DailyDataPreparer:
 
                 # Step 2c: Save the final document to a file
                 if processed_data:
-                    # Custom JSON encoder to handle datetime objects
-                    class DateTimeEncoder(json.JSONEncoder):
-                        def default(self, obj):
-                            if isinstance(obj, datetime):
-                                return obj.isoformat()
-                            return super(DateTimeEncoder, self).default(obj)
-                    
                     with open(output_path, 'w') as f:
-                        json.dump(processed_data, f, indent=4, cls=DateTimeEncoder)
+                        if UNIFIED_PRETTY:
+                            json.dump(processed_data, f, indent=2, cls=_DateTimeEncoder)
+                        else:
+                            json.dump(processed_data, f, separators=(',', ':'), cls=_DateTimeEncoder)
                     logger.info(f"Successfully saved unified data for fixture {fixture_id} to {output_path}")
-                    processed_count += 1
+                    run_summary["written"].append((fixture_id, output_path))
                 else:
                     logger.error(f"FixtureDetailsFetcher returned no data for fixture {fixture_id}.")
-                    failed_count += 1
+                    run_summary["failed"].append((fixture_id, output_path))
 
             except Exception as e:
                 logger.error(f"An unexpected error occurred while processing fixture {fixture_id}: {e}", exc_info=True)
-                failed_count += 1
+                run_summary["failed"].append((fixture_id, output_path))
         
         logger.info("--- DATA PREPARATION SUMMARY ---")
         logger.info(f"Date Processed         : {date_str}")
-        logger.info(f"Successfully processed : {processed_count}")
-        logger.info(f"Skipped (already exist): {skipped_count}")
-        logger.info(f"Failed fixtures        : {failed_count}")
+        logger.info(f"Successfully processed : {len(run_summary['written'])}")
+        logger.info(f"Skipped (already exist): {len(run_summary['skipped'])}")
+        logger.info(f"Failed fixtures        : {len(run_summary['failed'])}")
         logger.info("----------------------------------")
+        return run_summary
 
     def _sanitize_filename(self, name: str) -> str:
         """
@@ -176,24 +244,21 @@ class DailyDataPreparer:
         logger.info(f"extract_games called for {date_str} (compatibility mode)")
         
         # Call the main method
-        await self.prepare_data_for_date(date_str, force_reprocess=False)
+        run_summary = await self.prepare_data_for_date(date_str, force_reprocess=False)
         
-        # Return a summary in the format expected by pipeline files
-        fixture_ids = self.extract_fixture_ids_for_date(date_str)
-        
-        games_processed_summary = []
-        for fixture_id in fixture_ids:
-            output_path = os.path.join(UNIFIED_DATA_DIR, f"unified_fixture_{fixture_id}.json")
-            if os.path.exists(output_path):
-                games_processed_summary.append({
-                    "fixture_id": fixture_id,
-                    "status": "processed",
-                    "file_path": output_path
-                })
+        # Return a summary in the format expected by pipeline files, built from the run itself
+        games_processed_summary = [
+            {
+                "fixture_id": fixture_id,
+                "status": "processed",
+                "file_path": output_path
+            }
+            for fixture_id, output_path in sorted(run_summary["written"] + run_summary["skipped"])
+        ]
         
         return {
             "games_processed_summary": games_processed_summary,
-            "total_fixtures": len(fixture_ids),
+            "total_fixtures": len(run_summary["fixture_ids"]),
             "processed_fixtures": len(games_processed_summary)
         }
 
@@ -226,6 +291,7 @@ async def main():
     except Exception as e:
         logger.critical(f"A critical error occurred in the main execution block: {e}", exc_info=True)
     finally:
+        preparer.close()
         preparer.db_manager.close_connection()
         logger.info("MongoDB connection closed.")
 
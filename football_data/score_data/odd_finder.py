@@ -3,9 +3,34 @@
 import json
 import os
 import logging
+import functools
+import itertools
+import operator
+import collections
+import mmap
+import concurrent.futures
 from decimal import Decimal, ROUND_HALF_UP
 from datetime import datetime, date
 import sys
+import numpy as np
+
+# orjson is optional; fall back to the stdlib parser/encoder when it is not installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
+
+# Stdlib encoders built once and reused by the fallbacks below (analysis data is acyclic)
+_compact_encode = json.JSONEncoder(default=str, check_circular=False, separators=(',', ':')).encode
+_pretty_encode = json.JSONEncoder(check_circular=False, ensure_ascii=False, indent=2).encode
+
+def _fast_dumps(data):
+    """Compact JSON bytes for comparisons; non-JSON values (e.g. Decimal) are encoded with str()."""
+    if orjson is not None:
+        return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return _compact_encode(data).encode()
 
 # Ensure the db_mongo import path is correct relative to this script's location
 script_dir_for_import = os.path.dirname(os.path.abspath(__file__))
@@ -16,6 +41,12 @@ get_data_dir_for_import = os.path.join(project_root_for_import, 'get_data', 'api
 if project_root_for_import not in sys.path:
     sys.path.insert(0, project_root_for_import)
 
+# ijson is optional; without it batch files are always loaded whole
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 try:
     from football_data.get_data.api_football.db_mongo import db_manager, logger
 except ImportError as e:
@@ -28,6 +59,12 @@ project_root = os.path.abspath(os.path.join(script_dir, '..'))
 
 # OUTPUT_DIR removed as we write back to original files
 
+# Files above this size are memory-mapped and parsed in place (requires orjson)
+MMAP_THRESHOLD_BYTES = 2 * 1024 * 1024
+# Batch files above this size are streamed fixture by fixture (requires ijson)
+STREAM_THRESHOLD_BYTES = 64 * 1024 * 1024
+STREAM_CHUNK_SIZE = 256 # Fixtures parsed, priced and written per streaming step
+
 # Configure logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -43,6 +80,147 @@ if not logger.handlers:
 # --- Target the specific input/output file ---
 INPUT_OUTPUT_FILE = os.path.join(project_root, "data", "output", "batch_prediction_results.json")
 BOOKMAKER_NAME = "Bet365" # Or specify which bookmaker's odds to use
+BATCH_WORKERS = 16 # Threads used to process batch fixtures concurrently
+PROCESS_CHUNK_SIZE = 64 # Fixtures sent to a worker process per task when --processes is used
+
+# --- Scoring constants and output precision (Decimal steps used by quantize_decimal) ---
+PROBABILITY_THRESHOLD = 0.61 # Simple bets must have predicted probability above this
+DEFAULT_PREDICTABILITY_WEIGHT = Decimal('0.75') # Assume 7.5/10 if missing
+MAX_PREDICTABILITY_SCORE_FLOAT = 10.0
+Q_ODDS = Decimal('0.01') # Standard for odds
+Q_EDGE = Decimal('0.001') # Edges, ratios and find_matched_bets odds/implied probabilities
+Q_PROB = Decimal('0.0001') # Probabilities and final scores
+_DECIMAL_HUNDRED = Decimal('100')
+_DECIMAL_ONE = Decimal('1.0')
+_DECIMAL_TINY = Decimal('0.000001') # Below this, values are written in scientific notation
+
+# --- Market Mappings (built once at import) ---
+# Simple predictions -> (Bet365 market name, Bet365 value)
+MARKET_MAP_SIMPLE = {
+    "Over 0.5 Goals": ("Goals Over/Under", "Over 0.5"),
+    "Over 1.5 Goals": ("Goals Over/Under", "Over 1.5"),
+    "Over 2.5 Goals": ("Goals Over/Under", "Over 2.5"),
+    "Over 3.5 Goals": ("Goals Over/Under", "Over 3.5"),
+    "Over 4.5 Goals": ("Goals Over/Under", "Over 4.5"),
+    "Under 0.5 Goals": ("Goals Over/Under", "Under 0.5"),
+    "Under 1.5 Goals": ("Goals Over/Under", "Under 1.5"),
+    "Under 2.5 Goals": ("Goals Over/Under", "Under 2.5"),
+    "Under 3.5 Goals": ("Goals Over/Under", "Under 3.5"),
+    "Under 4.5 Goals": ("Goals Over/Under", "Under 4.5"),
+    "BTTS Yes": ("Both Teams Score", "Yes"),
+    "BTTS No": ("Both Teams Score", "No"),
+    "Home Win": ("Match Winner", "Home"),
+    "Draw": ("Match Winner", "Draw"),
+    "Away Win": ("Match Winner", "Away"),
+    "Home or Draw": ("Double Chance", "Home/Draw"),
+    "Away or Draw": ("Double Chance", "Draw/Away"),
+    "No Draw (Home or Away Win)": ("Double Chance", "Home/Away"),
+    # Abbreviations
+    "O0.5": ("Goals Over/Under", "Over 0.5"),
+    "O1.5": ("Goals Over/Under", "Over 1.5"),
+    "O2.5": ("Goals Over/Under", "Over 2.5"),
+    "O3.5": ("Goals Over/Under", "Over 3.5"),
+    "O4.5": ("Goals Over/Under", "Over 4.5"),
+    "U0.5": ("Goals Over/Under", "Under 0.5"),
+    "U1.5": ("Goals Over/Under", "Under 1.5"),
+    "U2.5": ("Goals Over/Under", "Under 2.5"),
+    "U3.5": ("Goals Over/Under", "Under 3.5"),
+    "U4.5": ("Goals Over/Under", "Under 4.5"),
+    "1": ("Match Winner", "Home"),
+    "X": ("Match Winner", "Draw"),
+    "2": ("Match Winner", "Away"),
+    "1X": ("Double Chance", "Home/Draw"),
+    "X2": ("Double Chance", "Draw/Away"),
+    "12": ("Double Chance", "Home/Away"),
+    "H": ("Match Winner", "Home"),
+    "D": ("Match Winner", "Draw"),
+    "A": ("Match Winner", "Away"),
+}
+# "Over 2.5" style keys without the " Goals" suffix
+MARKET_MAP_SIMPLE.update({
+    key[:-len(" Goals")]: target for key, target in list(MARKET_MAP_SIMPLE.items()) if key.endswith(" Goals")
+})
+
+# Combined markets (Add more as needed based on Bet365 actual names)
+# These are guesses - **VERIFY AGAINST ACTUAL DB DATA**
+MARKET_MAP_COMBINED = {
+    "Match Result and Both Teams To Score": "Results/Both Teams Score", # Updated to match DB example
+    "Double Chance and Total Goals": "Double Chance / Total Goals", # Example Bet365 name
+    "Match Result and Total Goals": "Result/Total Goals", # Updated to match DB example
+    "Both Teams To Score and Total Goals": "Total Goals/Both Teams To Score" # Updated to match DB example
+    # --- Potential Alternative Names (Add if needed based on DB data) ---
+    # "Match Result and Total Goals": "Result / Total Goals",
+    # "Both Teams To Score and Total Goals": "BTTS / Total Goals",
+}
+
+# Maps 'basic_probabilities' keys to the bet names used in 'top_probable_bets'
+REMAP_BASIC = {
+    "home_win": "Home Win", "draw": "Draw", "away_win": "Away Win", "over_0.5": "Over 0.5 Goals",
+    "over_1.5": "Over 1.5 Goals", "over_2.5": "Over 2.5 Goals", "over_3.5": "Over 3.5 Goals", "over_4.5": "Over 4.5 Goals",
+    "under_0.5": "Under 0.5 Goals", "under_1.5": "Under 1.5 Goals", "under_2.5": "Under 2.5 Goals", "under_3.5": "Under 3.5 Goals", "under_4.5": "Under 4.5 Goals",
+    "btts_yes": "BTTS Yes", "btts_no": "BTTS No", "home_draw": "Home or Draw", "away_draw": "Away or Draw", "home_away": "No Draw (Home or Away Win)"
+}
+
+# Component maps for combined selections
+_RESULT_MAP = {"1": "Home", "X": "Draw", "2": "Away", "H": "Home", "D": "Draw", "A": "Away", "Home Win": "Home", "Draw": "Draw", "Away Win": "Away"}
+_BTTS_MAP = {"BTTS Yes": "Yes", "BTTS No": "No"}
+_DC_MAP = {"1X": "Home/Draw", "X2": "Draw/Away", "12": "Home/Away"}
+_OU_MAP = { # Maps normalized input like U3.5 to Bet365 value like Under 3.5
+    "O0.5": "Over 0.5", "O1.5": "Over 1.5", "O2.5": "Over 2.5", "O3.5": "Over 3.5", "O4.5": "Over 4.5",
+    "U0.5": "Under 0.5", "U1.5": "Under 1.5", "U2.5": "Under 2.5", "U3.5": "Under 3.5", "U4.5": "Under 4.5"
+}
+
+# Deletes every non-alphanumeric ASCII character in a single str.translate pass
+_NON_ALNUM_TABLE = str.maketrans('', '', ''.join(chr(i) for i in range(128) if not chr(i).isalnum()))
+
+def normalize_market_text(text):
+    """
+    Normalizes market names/values for comparison (lowercase, alphanumerics only).
+    Results are interned so index keys and lookup targets share identity and compare by pointer.
+    """
+    return sys.intern(text.lower().translate(_NON_ALNUM_TABLE))
+
+_SIMPLE_NORMALIZED = {normalize_market_text(key): target for key, target in MARKET_MAP_SIMPLE.items()}
+
+# Pre-normalized (market, value) index keys for the common single-character 1X2/HDA predictions
+_FAST_1X2 = {
+    key: (normalize_market_text(MARKET_MAP_SIMPLE[key][0]), normalize_market_text(MARKET_MAP_SIMPLE[key][1]))
+    for key in ("H", "D", "A", "1", "X", "2")
+}
+
+# --- Combined selection dispatch: {category pair -> builder(parts by category) -> (market, value)} ---
+_CATEGORIZE = {
+    **{key: 'RES' for key in _RESULT_MAP},
+    **{key: 'BTTS' for key in _BTTS_MAP},
+    **{key: 'DC' for key in _DC_MAP},
+    **{key: 'OU' for key in _OU_MAP},
+}
+
+def _combined_result_btts(parts):
+    """Result & BTTS, e.g. "A and BTTS Yes" -> Bet365 "Home/Yes" style ** VERIFY **."""
+    return MARKET_MAP_COMBINED["Match Result and Both Teams To Score"], f"{_RESULT_MAP[parts['RES']]}/{_BTTS_MAP[parts['BTTS']]}"
+
+def _combined_dc_ou(parts):
+    """Double Chance & O/U, e.g. "12 and U3.5" -> "Home/Away / Under 3.5" (guessed name/format) ** VERIFY **."""
+    return MARKET_MAP_COMBINED["Double Chance and Total Goals"], f"{_DC_MAP[parts['DC']]} / {_OU_MAP[parts['OU']]}"
+
+def _combined_btts_ou(parts):
+    """BTTS & O/U, e.g. "BTTS Yes and O2.5" -> Bet365 "o/yes 2.5" format ** VERIFY / ADJUST **."""
+    ou_part_key = parts['OU']
+    o_u_prefix = "o" if ou_part_key.startswith("O") else "u"
+    btts_suffix = "yes" if _BTTS_MAP[parts['BTTS']] == "Yes" else "no"
+    return MARKET_MAP_COMBINED["Both Teams To Score and Total Goals"], f"{o_u_prefix}/{btts_suffix} {ou_part_key[1:]}"
+
+def _combined_result_ou(parts):
+    """Result & O/U, e.g. "H and O2.5" -> Bet365 "Home/Over 2.5" ** VERIFY **."""
+    return MARKET_MAP_COMBINED["Match Result and Total Goals"], f"{_RESULT_MAP[parts['RES']]}/{_OU_MAP[parts['OU']]}"
+
+_COMBINED_DISPATCH = {
+    frozenset(('RES', 'BTTS')): _combined_result_btts,
+    frozenset(('DC', 'OU')): _combined_dc_ou,
+    frozenset(('BTTS', 'OU')): _combined_btts_ou,
+    frozenset(('RES', 'OU')): _combined_result_ou,
+}
 
 def get_fixture_id_from_filename(filename):
     """Extracts fixture ID from the JSON filename."""
@@ -53,24 +231,61 @@ def get_fixture_id_from_filename(filename):
         logger.error(f"Could not extract fixture ID from {filename}")
         return None
 
+def iso_date_prefix(date_str):
+    """
+    Returns 'YYYY-MM-DD' from a string that is exactly an ASCII date or a date followed by
+    'T' (the lenient 'date part' parse accepts those), or None. Callers still check the date
+    with is_valid_calendar_date; anything else, e.g. a space-separated time, is left to the
+    strict parsers.
+    """
+    if ((len(date_str) == 10 or (len(date_str) > 10 and date_str[10] == 'T'))
+            and date_str[4] == '-' and date_str[7] == '-' and date_str[:10].isascii()
+            and date_str[:4].isdigit() and date_str[5:7].isdigit() and date_str[8:10].isdigit()):
+        return date_str[:10]
+    return None
+
+def read_json_file(filepath):
+    """
+    Parses a JSON file. Large files are memory-mapped and handed to orjson directly,
+    sharing the OS page cache instead of allocating a full-size copy per read.
+    """
+    if orjson is not None and os.path.getsize(filepath) > MMAP_THRESHOLD_BYTES:
+        with open(filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                return orjson.loads(view)
+    with open(filepath, 'rb') as f:
+        return _json_loads(f.read())
+
+@functools.lru_cache(maxsize=4096)
+def is_valid_calendar_date(date_part):
+    """Returns True if a 'YYYY-MM-DD' string is a real calendar date. Cached: batches share few dates."""
+    try:
+        datetime.strptime(date_part, '%Y-%m-%d')
+        return True
+    except ValueError:
+        return False
+
 def load_processed_match_data(filepath):
     """Loads JSON data from a file, returning the raw data and date."""
     try:
-        with open(filepath, 'r') as f:
-            data = json.load(f)
+        data = read_json_file(filepath)
         date_str = data.get("match_info", {}).get("date")
         match_date_simple = None
         if date_str:
-            try:
-                date_obj = datetime.fromisoformat(date_str.replace('+00:00', 'Z'))
-                match_date_simple = date_obj.strftime('%Y-%m-%d')
-            except ValueError:
+            match_date_simple = iso_date_prefix(date_str)
+            if match_date_simple is None or not is_valid_calendar_date(match_date_simple):
+                match_date_simple = None
                 try:
-                    date_obj = datetime.strptime(date_str.split('T')[0], '%Y-%m-%d')
+                    date_obj = datetime.fromisoformat(date_str.replace('+00:00', 'Z'))
                     match_date_simple = date_obj.strftime('%Y-%m-%d')
-                    logger.warning(f"Parsed only date part from '{date_str}' in {filepath}")
                 except ValueError:
-                    logger.error(f"Could not parse date '{date_str}' from {filepath}")
+                    # Not ISO-8601; fall back to a lenient parse of the date part
+                    try:
+                        date_obj = datetime.strptime(date_str.split('T')[0], '%Y-%m-%d')
+                        match_date_simple = date_obj.strftime('%Y-%m-%d')
+                        logger.warning(f"Parsed only date part from '{date_str}' in {filepath}")
+                    except ValueError:
+                        logger.error(f"Could not parse date '{date_str}' from {filepath}")
         else:
             logger.warning(f"Could not find match_info.date in {filepath}")
         return data, match_date_simple
@@ -85,8 +300,42 @@ def load_processed_match_data(filepath):
         return None, None
 
 
-def get_odds_from_db(fixture_id, match_date_simple, bookmaker_name): # Added match_date_simple
-    """Fetches odds data using MongoDBManager for dynamic collection selection."""
+# Cleared in worker processes: they inherit the parent's MongoClient, which is not fork-safe
+_db_lookups_allowed = True
+
+@functools.lru_cache(maxsize=4096)
+def _fetch_bookmaker_bets(fixture_id_int, bookmaker_name):
+    """Fetches one bookmaker's bets for a fixture (filtered server-side), memoized so repeat lookups skip the round-trip."""
+    return db_manager.get_odds_for_bookmaker(str(fixture_id_int), bookmaker_name)
+
+
+def preload_odds_for_fixtures(fixture_ids, bookmaker_name):
+    """
+    Fetches the bookmaker's bets for all fixtures of a batch with a single $in query.
+    Returns {fixture_id_int: bets or None}; pass it to get_odds_from_db as `prefetched`.
+    """
+    fixture_id_ints = set()
+    for fixture_id in fixture_ids:
+        try:
+            fixture_id_ints.add(int(fixture_id))
+        except (TypeError, ValueError):
+            continue
+    if not fixture_id_ints:
+        return {}
+    try:
+        bulk_bets = db_manager.get_odds_for_bookmaker_bulk([str(fid) for fid in fixture_id_ints], bookmaker_name)
+    except Exception as e:
+        logger.error(f"Error preloading odds for {len(fixture_id_ints)} fixtures: {e}")
+        return {}
+    logger.info(f"Preloaded '{bookmaker_name}' odds for {len(bulk_bets)}/{len(fixture_id_ints)} fixtures.")
+    return {fid: bulk_bets.get(str(fid)) for fid in fixture_id_ints}
+
+
+def get_odds_from_db(fixture_id, match_date_simple, bookmaker_name, prefetched=None): # Added match_date_simple
+    """
+    Fetches odds data using MongoDBManager for dynamic collection selection.
+    Fixtures present in `prefetched` (see preload_odds_for_fixtures) skip the DB call.
+    """
     if not fixture_id:
         logger.error("Error: No fixture ID provided for DB lookup.")
         return None
@@ -102,78 +351,69 @@ def get_odds_from_db(fixture_id, match_date_simple, bookmaker_name): # Added mat
         logger.error(f"Error: Invalid fixture ID format: {fixture_id}")
         return None
 
-    odds_data = None
+    if prefetched is not None and fixture_id_int in prefetched:
+        bets = prefetched[fixture_id_int]
+        if bets is None:
+            logger.warning(f"Could not find odds for bookmaker '{bookmaker_name}' for fixture_id: {fixture_id_int} on date {match_date_simple}.")
+        return bets
+
+    if not _db_lookups_allowed:
+        logger.warning(f"No preloaded odds for fixture_id {fixture_id_int} in worker process; skipping DB lookup.")
+        return None
+
     try:
-        # Use db_manager to get the specific odds document using its get_odds_data method
-        # This method handles getting the correct monthly collection based on date (comment implies internal handling)
-        # --- MODIFIED CALL: Pass only fixture_id based on TypeError ---
-        logger.debug(f"Calling db_manager.get_odds_data with fixture_id: {fixture_id_int} (Date context: {match_date_simple})")
-        odds_data = db_manager.get_odds_data(str(fixture_id_int))
-        # --- END MODIFICATION ---
-
-        if not odds_data:
-            # db_manager.get_odds_data already logs errors, so just a confirmation here
-            logger.debug(f"No odds data found via db_manager for fixture_id: {fixture_id_int} on date {match_date_simple}")
+        # The aggregation returns exactly the bookmaker's bet list (or None if the fixture/bookmaker is missing)
+        logger.debug("Calling db_manager.get_odds_for_bookmaker with fixture_id: %s (Date context: %s)", fixture_id_int, match_date_simple)
+        bets = _fetch_bookmaker_bets(fixture_id_int, bookmaker_name)
+
+        if bets is None:
+            logger.warning(f"Could not find odds for bookmaker '{bookmaker_name}' for fixture_id: {fixture_id_int} on date {match_date_simple}.")
             return None
 
-        # Option 1: If payload saved is the top-level response containing the nested structure
-        bookmakers_top_list = odds_data.get("bookmakers", []) # Check top level first
-        if isinstance(bookmakers_top_list, list):
-             for bookmaker_entry in bookmakers_top_list:
-                 if isinstance(bookmaker_entry, dict) and "bookmakers" in bookmaker_entry:
-                      nested_bookmakers = bookmaker_entry.get("bookmakers", [])
-                      if isinstance(nested_bookmakers, list):
-                          for sub_bookmaker in nested_bookmakers:
-                              if isinstance(sub_bookmaker, dict) and sub_bookmaker.get("name") == bookmaker_name:
-                                   logger.debug(f"Found bookmaker '{bookmaker_name}' in nested structure for fixture {fixture_id_int}")
-                                   return sub_bookmaker.get("bets", [])
-
-        # Option 2: If the payload saved *is* the inner bookmaker object directly (less likely based on example)
-        if isinstance(odds_data.get("bookmakers"), list): # Assuming 'bookmakers' is the key holding the list of bet markets
-            for bookmaker_details in odds_data.get("bookmakers", []): # This assumes a different structure than example
-                if isinstance(bookmaker_details, dict) and bookmaker_details.get("name") == bookmaker_name:
-                     logger.debug(f"Found bookmaker '{bookmaker_name}' directly in odds_data for fixture {fixture_id_int}")
-                     return bookmaker_details.get("bets", []) # Adapt key if necessary
-
-        # Option 3: If the odds_payload is just the list of bookmakers [{id:8, name:"Bet365", bets:[...]}, ...]
-        if isinstance(odds_data, list): # If the root document IS the list of bookmakers
-             for bookmaker_entry in odds_data:
-                  if isinstance(bookmaker_entry, dict) and bookmaker_entry.get("name") == bookmaker_name:
-                      logger.debug(f"Found bookmaker '{bookmaker_name}' in root list for fixture {fixture_id_int}")
-                      return bookmaker_entry.get("bets", [])
-
-
-        logger.warning(f"Could not find odds structure for bookmaker '{bookmaker_name}' within the document for fixture_id: {fixture_id_int}.")
-        return None
+        logger.debug("Found bookmaker '%s' for fixture %s", bookmaker_name, fixture_id_int)
+        return bets
 
-    except Exception as e:
-        logger.error(f"Error fetching/parsing odds from MongoDB via db_manager for fixture_id {fixture_id_int}: {e}")
-        import traceback
-        traceback.print_exc() # Print full traceback for debugging
+    except Exception:
+        logger.exception("Error fetching/parsing odds from MongoDB via db_manager for fixture_id %s", fixture_id_int)
         return None
 
 
 def parse_probability_string(prob_string):
-    """Converts prediction probability string (e.g., '76.7%') to a Decimal."""
+    """Converts prediction probability string (e.g., '76.7%') to a float."""
     if not isinstance(prob_string, str):
          logger.warning(f"Invalid probability input type: {type(prob_string)}, value: {prob_string}")
          return None
     try:
-        return Decimal(prob_string.strip('%')) / Decimal(100)
-    except Exception:
+        return float(prob_string.strip('%')) * 0.01
+    except ValueError:
         logger.error(f"Could not parse probability string: {prob_string}")
         return None
 
+def parse_probability_array(prob_strings):
+    """
+    Converts a list of probability strings (e.g., '76.7%') to a float64 array of fractions.
+    Unparseable entries become NaN, so they fail any threshold comparison.
+    """
+    try:
+        return np.char.strip(np.array(prob_strings, dtype=str), '%').astype(np.float64) * 0.01
+    except (ValueError, TypeError):
+        # At least one malformed entry; parse individually so each failure is logged
+        parsed = (parse_probability_string(prob_string) for prob_string in prob_strings)
+        return np.array([np.nan if prob is None else prob for prob in parsed], dtype=np.float64)
+
+@functools.lru_cache(maxsize=1024)
 def calculate_implied_probability(odds_string):
-    """Calculates implied probability from decimal odds string."""
+    """
+    Calculates implied probability (float) from decimal odds string.
+    Memoized: bookmakers quote a small set of distinct odds, so most calls repeat.
+    """
     if not odds_string:
          # logger.warning("Received empty odds string for implied probability calculation.") # Reduce noise
          return None
     try:
-        odds = Decimal(str(odds_string)) # Ensure it's a string first for Decimal
+        odds = float(odds_string)
         if odds > 0:
-            # Add a small epsilon to avoid division by zero if odds are extremely high (though unlikely for decimal)
-            return Decimal(1) / (odds + Decimal('0.00000001'))
+            return 1.0 / odds
         else:
             logger.warning(f"Received non-positive odds: {odds_string}")
             return None
@@ -181,74 +421,109 @@ def calculate_implied_probability(odds_string):
          logger.error(f"Could not parse odds string '{odds_string}': {e}")
          return None
 
-def find_matching_odds(prediction_bet, prediction_type, odds_list):
+@functools.lru_cache(maxsize=1024)
+def calculate_implied_probability_decimal(odds_string):
+    """
+    Calculates implied probability as a Decimal from decimal odds string, for
+    metrics that are quantized for output. Returns None for missing or non-positive odds.
+    """
+    if not odds_string:
+         return None
+    try:
+        odds = Decimal(str(odds_string))
+        if odds > 0:
+            return _DECIMAL_ONE / odds
+        else:
+            logger.warning(f"Received non-positive odds: {odds_string}")
+            return None
+    except Exception as e:
+         logger.error(f"Could not parse odds string '{odds_string}': {e}")
+         return None
+
+def quantize_decimal(value, step):
+    """Converts a float result to Decimal rounded to `step` (ROUND_HALF_UP) for output."""
+    return Decimal(str(value)).quantize(step, ROUND_HALF_UP)
+
+def build_odds_index(odds_list):
+    """
+    Indexes a bookmaker's bets once per fixture as
+    {normalized market name: (normalized values tuple, odds tuple)}.
+    Markets hold only a handful of values, so parallel tuples searched with
+    tuple.index (see lookup_in_index) beat a per-market dict.
+    Malformed entries are skipped here so lookups can assume a valid shape.
+    The first occurrence wins if a market/value appears more than once.
+    """
+    market_columns = {}
+    if not odds_list:
+        return market_columns
+    malformed_count = 0
+    for market in odds_list:
+        if not isinstance(market, dict) or not market.get("name"):
+            malformed_count += 1
+            continue
+        norm_values, odds = market_columns.setdefault(normalize_market_text(market["name"]), ([], []))
+        for value_odd_pair in market.get("values") or []:
+            if not isinstance(value_odd_pair, dict):
+                malformed_count += 1
+                continue
+            value_from_db = value_odd_pair.get("value")
+            odd = value_odd_pair.get("odd")
+            if not value_from_db or odd is None:
+                malformed_count += 1
+                continue
+            norm_values.append(normalize_market_text(value_from_db))
+            odds.append(odd)
+    if malformed_count:
+        logger.warning("Skipped %d malformed market/value entries while indexing odds.", malformed_count)
+    return {market: (tuple(norm_values), tuple(odds)) for market, (norm_values, odds) in market_columns.items()}
+
+def lookup_in_index(odds_index, norm_market, norm_value):
+    """
+    Returns the odd for a normalized market/value pair from build_odds_index, or None.
+    """
+    market_columns = odds_index.get(norm_market)
+    if not market_columns:
+        return None
+    norm_values, odds = market_columns
+    try:
+        return odds[norm_values.index(norm_value)]
+    except ValueError:
+        return None
+
+def make_odds_lookup(odds_index):
+    """
+    Binds find_matching_odds to one fixture's odds index and memoizes it, so a bet
+    queried repeatedly for the same fixture (e.g. combined-selection parts) resolves once.
+    """
+    @functools.lru_cache(maxsize=None)
+    def lookup(prediction_bet, prediction_type):
+        return find_matching_odds(prediction_bet, prediction_type, odds_index=odds_index)
+    return lookup
+
+def find_matching_odds(prediction_bet, prediction_type, odds_list=None, odds_index=None):
     """
     Finds the matching odds for a given prediction (simple or combined).
     Includes enhanced logging.
     Handles simple types and combined selections from 'top_n_combined_selections'.
     Recognizes H/D/A abbreviations for Match Winner.
+    Pass a prebuilt `odds_index` (see build_odds_index) when looking up many
+    predictions against the same fixture's odds.
     """
-    logger.debug(f"Attempting to find odds for prediction: '{prediction_bet}' (Type: {prediction_type})") # Log input
+    logger.debug("Attempting to find odds for prediction: '%s' (Type: %s)", prediction_bet, prediction_type) # Log input
 
-    if not odds_list: # Added check
+    if odds_index is None:
+        odds_index = build_odds_index(odds_list)
+    if not odds_index: # Added check
         logger.warning("Odds list is empty, cannot find match.")
         return None
 
-    # --- Define Market Mappings ---
-    # Simple markets (as before)
-    market_map_simple = {
-        "Over 0.5 Goals": {"market_name": "Goals Over/Under", "value_prefix": "Over ", "value_suffix": ""},
-        "Over 1.5 Goals": {"market_name": "Goals Over/Under", "value_prefix": "Over ", "value_suffix": ""},
-        "Over 2.5 Goals": {"market_name": "Goals Over/Under", "value_prefix": "Over ", "value_suffix": ""},
-        "Over 3.5 Goals": {"market_name": "Goals Over/Under", "value_prefix": "Over ", "value_suffix": ""},
-        "Over 4.5 Goals": {"market_name": "Goals Over/Under", "value_prefix": "Over ", "value_suffix": ""},
-        "Under 0.5 Goals": {"market_name": "Goals Over/Under", "value_prefix": "Under ", "value_suffix": ""},
-        "Under 1.5 Goals": {"market_name": "Goals Over/Under", "value_prefix": "Under ", "value_suffix": ""},
-        "Under 2.5 Goals": {"market_name": "Goals Over/Under", "value_prefix": "Under ", "value_suffix": ""},
-        "Under 3.5 Goals": {"market_name": "Goals Over/Under", "value_prefix": "Under ", "value_suffix": ""},
-        "Under 4.5 Goals": {"market_name": "Goals Over/Under", "value_prefix": "Under ", "value_suffix": ""},
-        "BTTS Yes": {"market_name": "Both Teams Score", "value_prefix": "Yes", "value_suffix": ""},
-        "BTTS No": {"market_name": "Both Teams Score", "value_prefix": "No", "value_suffix": ""},
-        "Home Win": {"market_name": "Match Winner", "value_prefix": "Home", "value_suffix": ""},
-        "Draw": {"market_name": "Match Winner", "value_prefix": "Draw", "value_suffix": ""},
-        "Away Win": {"market_name": "Match Winner", "value_prefix": "Away", "value_suffix": ""},
-        "Home or Draw": {"market_name": "Double Chance", "value_prefix": "Home/Draw", "value_suffix": ""},
-        "Away or Draw": {"market_name": "Double Chance", "value_prefix": "Draw/Away", "value_suffix": ""},
-        "No Draw (Home or Away Win)": {"market_name": "Double Chance", "value_prefix": "Home/Away", "value_suffix": ""},
-        # Abbreviations
-        "O0.5": {"market_name": "Goals Over/Under", "value_prefix": "Over 0.5", "value_suffix": ""},
-        "O1.5": {"market_name": "Goals Over/Under", "value_prefix": "Over 1.5", "value_suffix": ""},
-        "O2.5": {"market_name": "Goals Over/Under", "value_prefix": "Over 2.5", "value_suffix": ""},
-        "O3.5": {"market_name": "Goals Over/Under", "value_prefix": "Over 3.5", "value_suffix": ""},
-        "O4.5": {"market_name": "Goals Over/Under", "value_prefix": "Over 4.5", "value_suffix": ""},
-        "U0.5": {"market_name": "Goals Over/Under", "value_prefix": "Under 0.5", "value_suffix": ""},
-        "U1.5": {"market_name": "Goals Over/Under", "value_prefix": "Under 1.5", "value_suffix": ""},
-        "U2.5": {"market_name": "Goals Over/Under", "value_prefix": "Under 2.5", "value_suffix": ""},
-        "U3.5": {"market_name": "Goals Over/Under", "value_prefix": "Under 3.5", "value_suffix": ""},
-        "U4.5": {"market_name": "Goals Over/Under", "value_prefix": "Under 4.5", "value_suffix": ""},
-        "1": {"market_name": "Match Winner", "value_prefix": "Home", "value_suffix": ""},
-        "X": {"market_name": "Match Winner", "value_prefix": "Draw", "value_suffix": ""},
-        "2": {"market_name": "Match Winner", "value_prefix": "Away", "value_suffix": ""},
-        "1X": {"market_name": "Double Chance", "value_prefix": "Home/Draw", "value_suffix": ""},
-        "X2": {"market_name": "Double Chance", "value_prefix": "Draw/Away", "value_suffix": ""},
-        "12": {"market_name": "Double Chance", "value_prefix": "Home/Away", "value_suffix": ""},
-        # Added H/D/A mappings
-        "H": {"market_name": "Match Winner", "value_prefix": "Home", "value_suffix": ""},
-        "D": {"market_name": "Match Winner", "value_prefix": "Draw", "value_suffix": ""},
-        "A": {"market_name": "Match Winner", "value_prefix": "Away", "value_suffix": ""},
-    }
-
-    # Combined markets (Add more as needed based on Bet365 actual names)
-    # These are guesses - **VERIFY AGAINST ACTUAL DB DATA**
-    market_map_combined = {
-        "Match Result and Both Teams To Score": "Results/Both Teams Score", # Updated to match DB example
-        "Double Chance and Total Goals": "Double Chance / Total Goals", # Example Bet365 name
-        "Match Result and Total Goals": "Result/Total Goals", # Updated to match DB example
-        "Both Teams To Score and Total Goals": "Total Goals/Both Teams To Score" # Updated to match DB example
-        # --- Potential Alternative Names (Add if needed based on DB data) ---
-        # "Match Result and Total Goals": "Result / Total Goals",
-        # "Both Teams To Score and Total Goals": "BTTS / Total Goals",
-    }
+    # --- Fast path: already-normalized 1X2/HDA predictions ---
+    fast_target = _FAST_1X2.get(prediction_bet)
+    if fast_target:
+        found_odd = lookup_in_index(odds_index, *fast_target)
+        if found_odd is not None:
+            return found_odd
+        # Fall through so the general path logs why no odd was found
 
     # --- Parsing Logic ---
     target_market_name = None
@@ -256,103 +531,15 @@ def find_matching_odds(prediction_bet, prediction_type, odds_list):
     is_combined = " and " in prediction_bet
 
     if not is_combined:
-        # Handle Simple Bets (including normalized O/U, 1X2, HDA)
+        # Handle Simple Bets (including normalized O/U, 1X2, HDA) with one normalized lookup
         simple_bet_part = prediction_bet.split(" + ")[0] # Handle potential future combo markers
-        mapping = market_map_simple.get(simple_bet_part)
-
+        mapping = _SIMPLE_NORMALIZED.get(normalize_market_text(simple_bet_part))
         if not mapping:
-            # Try normalizing "Over X.Y Goals" format if primary lookup fails
-            norm_prediction_bet = simple_bet_part.replace(" Goals", "")
-            parts = norm_prediction_bet.split(' ')
-            if len(parts) == 2 and parts[0] in ["Over", "Under"]:
-                simplified_bet_key = f"{parts[0]} {parts[1]} Goals"
-                logger.debug(f"  Trying simplified key: '{simplified_bet_key}'")
-                mapping = market_map_simple.get(simplified_bet_key)
+            logger.warning(f"No simple mapping found for prediction: '{prediction_bet}'")
+            return None
 
-        if not mapping:
-            # Check if it's a simple bet that might appear in combined selections (like 'U4.5')
-            # This is needed because process_combined_selections calls this function too.
-            logger.debug(f"No simple mapping found for prediction: '{prediction_bet}', checking common simple types...")
-            if simple_bet_part.startswith('O') or simple_bet_part.startswith('U'):
-                 ou_market_map = { # Simplified map just for O/U lookup here
-                     "O0.5": ("Goals Over/Under", "Over 0.5"), "O1.5": ("Goals Over/Under", "Over 1.5"),
-                     "O2.5": ("Goals Over/Under", "Over 2.5"), "O3.5": ("Goals Over/Under", "Over 3.5"),
-                     "O4.5": ("Goals Over/Under", "Over 4.5"),
-                     "U0.5": ("Goals Over/Under", "Under 0.5"), "U1.5": ("Goals Over/Under", "Under 1.5"),
-                     "U2.5": ("Goals Over/Under", "Under 2.5"), "U3.5": ("Goals Over/Under", "Under 3.5"),
-                     "U4.5": ("Goals Over/Under", "Under 4.5"),
-                 }
-                 market_val = ou_market_map.get(simple_bet_part)
-                 if market_val:
-                     target_market_name, target_value = market_val
-                     logger.debug(f"  Mapped simple bet '{simple_bet_part}' to Market='{target_market_name}', Value='{target_value}'")
-                 else:
-                     logger.warning(f"Could not map simple O/U prediction: '{prediction_bet}'")
-                     return None
-            elif simple_bet_part in ["1","X","2","1X","X2","12", "H", "D", "A"]: # Added H/D/A here
-                 market_val_map = {
-                     "1": ("Match Winner", "Home"), "X": ("Match Winner", "Draw"), "2": ("Match Winner", "Away"),
-                     "1X": ("Double Chance", "Home/Draw"), "X2": ("Double Chance", "Draw/Away"), "12": ("Double Chance", "Home/Away"),
-                     "H": ("Match Winner", "Home"), "D": ("Match Winner", "Draw"), "A": ("Match Winner", "Away"), # Added H/D/A
-                 }
-                 market_val = market_val_map.get(simple_bet_part)
-                 if market_val:
-                      target_market_name, target_value = market_val
-                      logger.debug(f"  Mapped simple bet '{simple_bet_part}' to Market='{target_market_name}', Value='{target_value}'")
-                 else:
-                      # This case should ideally not be reached if the map is correct
-                      logger.warning(f"Could not map simple 1X2/DC/HDA prediction: '{prediction_bet}'")
-                      return None
-            elif simple_bet_part in ["BTTS Yes", "BTTS No"]:
-                 market_val_map = {
-                     "BTTS Yes": ("Both Teams Score", "Yes"), "BTTS No": ("Both Teams Score", "No")
-                 }
-                 market_val = market_val_map.get(simple_bet_part)
-                 if market_val:
-                     target_market_name, target_value = market_val
-                     logger.debug(f"  Mapped simple bet '{simple_bet_part}' to Market='{target_market_name}', Value='{target_value}'")
-                 else:
-                      logger.warning(f"Could not map simple BTTS prediction: '{prediction_bet}'")
-                      return None
-            else:
-                 logger.warning(f"No simple mapping found for prediction: '{prediction_bet}'")
-                 return None
-
-
-        # If mapping was found via market_map_simple earlier
-        if not target_market_name: # Only if not already set by the direct O/U, 1X2 etc. lookup above
-             target_market_name = mapping["market_name"]
-             target_value = mapping["value_prefix"] # Start with the prefix
-
-             # Refine target_value based on market type
-             if target_market_name == "Goals Over/Under":
-                  # Ensure format like "Over 2.5" or "Under 1.5"
-                  ou_parts = simple_bet_part.split(" ")
-                  if len(ou_parts) >= 2: # e.g. O2.5 -> Over 2.5 or Over 2.5 Goals -> Over 2.5
-                      # Rebuild from normalized key if needed e.g. O2.5
-                      norm_key = ou_parts[0] if len(ou_parts[0]) > 1 else f"{ou_parts[0]}{ou_parts[1]}" # e.g. O2.5
-                      if norm_key.startswith('O'):
-                           target_value = f"Over {norm_key[1:]}"
-                      elif norm_key.startswith('U'):
-                           target_value = f"Under {norm_key[1:]}"
-                      else: # Handle "Over 2.5" case
-                          target_value = f"{ou_parts[0]} {ou_parts[1]}"
-
-
-             elif target_market_name == "Match Winner":
-                  # Covers "Home Win", "Draw", "Away Win", "1", "X", "2", "H", "D", "A" from map
-                  if simple_bet_part in ["Home Win", "1", "H"]: target_value = "Home"
-                  elif simple_bet_part in ["Away Win", "2", "A"]: target_value = "Away"
-                  elif simple_bet_part in ["Draw", "X", "D"]: target_value = "Draw"
-             elif target_market_name == "Both Teams Score":
-                  if simple_bet_part == "BTTS Yes": target_value = "Yes"
-                  elif simple_bet_part == "BTTS No": target_value = "No"
-             elif target_market_name == "Double Chance":
-                  if simple_bet_part in ["Home or Draw", "1X"]: target_value = "Home/Draw"
-                  elif simple_bet_part in ["Away or Draw", "X2"]: target_value = "Draw/Away"
-                  elif simple_bet_part in ["No Draw (Home or Away Win)", "12"]: target_value = "Home/Away"
-
-        logger.debug(f"  Simple Mapping Result: Target Market='{target_market_name}', Target Value='{target_value}'")
+        target_market_name, target_value = mapping
+        logger.debug("  Simple Mapping Result: Target Market='%s', Target Value='%s'", target_market_name, target_value)
 
     else:
         # Handle Combined Bets
@@ -362,70 +549,19 @@ def find_matching_odds(prediction_bet, prediction_type, odds_list):
             return None
 
         part1, part2 = parts
-        logger.debug(f"  Parsing combined bet: Part1='{part1}', Part2='{part2}'")
-
-        # Define helper maps here to avoid scope issues if defined within cases
-        # Updated result_map to include H/D/A
-        result_map = {"1": "Home", "X": "Draw", "2": "Away", "H": "Home", "D": "Draw", "A": "Away", "Home Win": "Home", "Draw": "Draw", "Away Win": "Away"}
-        btts_map = {"BTTS Yes": "Yes", "BTTS No": "No"}
-        dc_map = {"1X": "Home/Draw", "X2": "Draw/Away", "12": "Home/Away"}
-        ou_map = { # Maps normalized input like U3.5 to Bet365 value like Under 3.5
-             "O0.5": "Over 0.5", "O1.5": "Over 1.5", "O2.5": "Over 2.5", "O3.5": "Over 3.5", "O4.5": "Over 4.5",
-             "U0.5": "Under 0.5", "U1.5": "Under 1.5", "U2.5": "Under 2.5", "U3.5": "Under 3.5", "U4.5": "Under 4.5"
-        }
-
-        # --- Determine Combined Market and Value (Needs refinement based on actual data) ---
-
-        # Case 1: Result & BTTS (e.g., "A and BTTS Yes", "H and BTTS No")
-        if (part1 in result_map and part2 in btts_map) or (part2 in result_map and part1 in btts_map):
-            # Use the DB market name directly based on example data
-            target_market_name = "Results/Both Teams Score"
-            res_part = result_map[part1] if part1 in result_map else result_map[part2]
-            btts_part = btts_map[part1] if part1 in btts_map else btts_map[part2]
-            target_value = f"{res_part}/{btts_part}" # Bet365 uses "Home/Yes" etc. ** VERIFY **
-            logger.debug(f"  Combined Mapping (Result/BTTS): Market='{target_market_name}', Value='{target_value}'")
-
-        # Case 2: Double Chance & O/U (e.g., "12 and U3.5", "X2 and O1.5")
-        elif (part1 in dc_map and part2 in ou_map) or (part2 in dc_map and part1 in ou_map):
-            target_market_name = market_map_combined.get("Double Chance and Total Goals") # Keep guessed name for now
-            dc_part = dc_map[part1] if part1 in dc_map else dc_map[part2]
-            ou_part_key = part1 if part1 in ou_map else part2
-            ou_value_part = ou_map[ou_part_key] # e.g., "Under 3.5"
-            # Bet365 format might be like "Home/Draw & Over 2.5" - ** VERIFY **
-            target_value = f"{dc_part} / {ou_value_part}"
-            logger.debug(f"  Combined Mapping (DC/O-U): Market='{target_market_name}', Value='{target_value}'")
-
-        # Case 3: BTTS & O/U (e.g., "BTTS Yes and O2.5", "BTTS No and U3.5")
-        elif (part1 in btts_map and part2 in ou_map) or (part2 in btts_map and part1 in ou_map):
-            # Use the DB market name directly based on example data
-            target_market_name = "Total Goals/Both Teams To Score"
-            btts_part = btts_map[part1] if part1 in btts_map else btts_map[part2]
-            ou_part_key = part1 if part1 in ou_map else part2
-            ou_value_part = ou_map[ou_part_key] # e.g., "Over 2.5"
-            # Bet365 uses "o/yes 2.5" format - ** VERIFY / ADJUST **
-            # Constructing based on pattern: needs verification
-            o_u_prefix = "o" if ou_part_key.startswith("O") else "u"
-            btts_suffix = "yes" if btts_part == "Yes" else "no"
-            ou_number = ou_part_key[1:] # e.g. "2.5"
-            target_value = f"{o_u_prefix}/{btts_suffix} {ou_number}"
-            logger.debug(f"  Combined Mapping (BTTS/O-U): Market='{target_market_name}', Value='{target_value}'")
-
-        # Case 4: Result & O/U (e.g., "H and O2.5", "X and U1.5")
-        elif (part1 in result_map and part2 in ou_map) or (part2 in result_map and part1 in ou_map):
-            # Use the DB market name directly based on example data
-            target_market_name = "Result/Total Goals"
-            res_part = result_map[part1] if part1 in result_map else result_map[part2]
-            ou_part_key = part1 if part1 in ou_map else part2
-            ou_value_part = ou_map[ou_part_key] # e.g., "Under 1.5"
-            # Bet365 uses "Home/Under 2.5" etc. ** VERIFY **
-            target_value = f"{res_part}/{ou_value_part}"
-            logger.debug(f"  Combined Mapping (Result/O-U): Market='{target_market_name}', Value='{target_value}'")
+        logger.debug("  Parsing combined bet: Part1='%s', Part2='%s'", part1, part2)
 
+        # --- Determine Combined Market and Value via the category dispatch table ---
+        part_categories = {_CATEGORIZE.get(part1): part1, _CATEGORIZE.get(part2): part2}
+        build_combined_target = _COMBINED_DISPATCH.get(frozenset(part_categories))
+        if build_combined_target:
+            target_market_name, target_value = build_combined_target(part_categories)
+            logger.debug("  Combined Mapping: Market='%s', Value='%s'", target_market_name, target_value)
 
         if not target_market_name or not target_value:
             logger.warning(f"Could not determine combined market mapping for '{prediction_bet}'")
             # Attempt fallback: Check if the DB market name *is* the prediction string (sometimes happens)
-            logger.debug(f"    Attempting direct market name match for '{prediction_bet}'")
+            logger.debug("    Attempting direct market name match for '%s'", prediction_bet)
             target_market_name = prediction_bet
             target_value = prediction_bet # Value is often same as market name for simple combined representations
             # Let the search loop below try this fallback
@@ -435,112 +571,111 @@ def find_matching_odds(prediction_bet, prediction_type, odds_list):
          logger.warning(f"Target market name could not be determined for '{prediction_bet}'")
          return None
 
-    # --- Refined Search Logic ---
-    found_odd = None
+    # --- Indexed Search ---
     attempted_direct_match = (target_market_name == prediction_bet and target_value == prediction_bet) # Flag if using fallback
 
-    for market in odds_list:
-        if not isinstance(market, dict): continue
-        market_name_from_db = market.get("name")
-        if not market_name_from_db: continue
-
-        # Normalize names for comparison (lowercase, remove spaces, slashes)
-        # Example: "Result/Total Goals" -> "resulttotalgoals"
-        norm_target_market = ''.join(filter(str.isalnum, target_market_name.lower()))
-        norm_db_market = ''.join(filter(str.isalnum, market_name_from_db.lower()))
-
-        # Check if normalized market names match
-        if norm_target_market == norm_db_market:
-            logger.debug(f"    Found potentially matching market in DB: '{market_name_from_db}' (Target: '{target_market_name}')")
-            for value_odd_pair in market.get("values", []):
-                if not isinstance(value_odd_pair, dict): continue
-                value_from_db = value_odd_pair.get("value")
-                if not value_from_db: continue
-
-                # Normalize values for comparison
-                # Example: "Home/Over 2.5" -> "homeover25"
-                # Example: "o/yes 2.5" -> "oyes25"
-                norm_target_val = ''.join(filter(str.isalnum, target_value.lower().replace('.', '')))
-                norm_db_val = ''.join(filter(str.isalnum, value_from_db.lower().replace('.', '')))
-
-                # Special handling for "Total Goals/Both Teams To Score" values like "o/yes 2.5"
-                if market_name_from_db == "Total Goals/Both Teams To Score":
-                     # Target was constructed as "o/yes 2.5", DB is "o/yes 2.5" -> normalization works
-                     pass # Normalization should handle this
-
-                # Standard comparison
-                if norm_db_val == norm_target_val:
-                    odd_found = value_odd_pair.get("odd")
-                    logger.info(f"    SUCCESS: Found matching odd for '{market_name_from_db}' - '{value_from_db}': {odd_found}")
-                    found_odd = odd_found
-                    break # Exit inner loop once value is found
-            # If we found the odd, exit the outer market loop as well
-            if found_odd is not None:
-                break
-            else:
-                # If market name matched but value didn't, log warning
-                logger.warning(f"    Market '{market_name_from_db}' matched target '{target_market_name}', but target value '{target_value}' (normalized: '{norm_target_val}') not found in its values.")
-                # Continue searching other markets in case of duplicate market names? Unlikely but possible.
-                # For now, assume market names are unique enough. If value not found here, it's likely not present.
-
-    # If after checking all markets, we haven't found the odd
-    if found_odd is None:
-        if attempted_direct_match:
-             logger.warning(f"  Target market '{target_market_name}' (fallback attempt) not found or value not matched in the provided odds list.")
-        else:
-             logger.warning(f"  Target market '{target_market_name}' not found or value '{target_value}' not matched in the provided odds list.")
-        return None
+    # Example: "Result/Total Goals" -> "resulttotalgoals", "o/yes 2.5" -> "oyes25"
+    norm_target_val = normalize_market_text(target_value)
+    norm_target_market = normalize_market_text(target_market_name)
+    found_odd = lookup_in_index(odds_index, norm_target_market, norm_target_val)
+
+    if found_odd is not None:
+        logger.info(f"    SUCCESS: Found matching odd for '{target_market_name}' - '{target_value}': {found_odd}")
+        return found_odd
+
+    if norm_target_market in odds_index:
+        # If market name matched but value didn't, log warning
+        logger.warning(f"    Market '{target_market_name}' found, but target value '{target_value}' (normalized: '{norm_target_val}') not found in its values.")
+    if attempted_direct_match:
+         logger.warning(f"  Target market '{target_market_name}' (fallback attempt) not found or value not matched in the provided odds list.")
     else:
-         return found_odd # Return the successfully found odd
+         logger.warning(f"  Target market '{target_market_name}' not found or value '{target_value}' not matched in the provided odds list.")
+    return None
+
+# --- Context stat builders: (home_stats, away_stats, h2h_stats, home_1x2, away_1x2) -> stats ---
+def _context_over_under(h, a, hh, hp, ap):
+    return {
+        'home_avg_scored_h15': h.get('avg_goals_scored'),
+        'away_avg_scored_a15': a.get('avg_goals_scored'),
+        'home_ovr25_pct_h15': h.get('over_2_5_pct'),
+        'away_ovr25_pct_a15': a.get('over_2_5_pct'),
+        'h2h_avg_goals': hh.get('avg_total_goals'),
+        'h2h_ovr25_pct': hh.get('over_2_5_pct'),
+    }
+
+_CONTEXT_BUILDERS = {
+    "Home Win": lambda h, a, hh, hp, ap: {
+        'home_win_pct_h15': hp.get('win'),
+        'away_loss_pct_a15': ap.get('loss'),
+        'h2h_home_win_pct': hh.get('home_team_win_pct'),
+    },
+    "Away Win": lambda h, a, hh, hp, ap: {
+        'away_win_pct_a15': ap.get('win'),
+        'home_loss_pct_h15': hp.get('loss'),
+        'h2h_away_win_pct': hh.get('away_team_win_pct'),
+    },
+    "Draw": lambda h, a, hh, hp, ap: {
+        'home_draw_pct_h15': hp.get('draw'),
+        'away_draw_pct_a15': ap.get('draw'),
+        'h2h_draw_pct': hh.get('draw_pct'),
+    },
+    "BTTS Yes": lambda h, a, hh, hp, ap: {
+        'home_btts_pct_h15': h.get('btts_pct'),
+        'away_btts_pct_a15': a.get('btts_pct'),
+        'h2h_btts_pct': hh.get('btts_pct'),
+    },
+    "Home or Draw": lambda h, a, hh, hp, ap: {
+        'home_win_draw_pct_h15': hp.get('win', 0) + hp.get('draw', 0),
+        'h2h_home_win_draw_pct': hh.get('home_team_win_pct', 0) + hh.get('draw_pct', 0),
+    },
+    "Away or Draw": lambda h, a, hh, hp, ap: {
+        'away_win_draw_pct_a15': ap.get('win', 0) + ap.get('draw', 0),
+        'h2h_away_win_draw_pct': hh.get('away_team_win_pct', 0) + hh.get('draw_pct', 0),
+    },
+    "No Draw (Home or Away Win)": lambda h, a, hh, hp, ap: {
+        'home_win_pct_h15': hp.get('win'),
+        'away_win_pct_a15': ap.get('win'),
+        'h2h_no_draw_pct': hh.get('home_team_win_pct', 0) + hh.get('away_team_win_pct', 0),
+    },
+}
+_OVER_UNDER_PREFIXES = frozenset(("Over", "Under"))
+_EMPTY = {} # Shared read-only default for missing stat sections; never mutated
 
 def get_context_stats(processed_data, bet_name):
     """Extracts relevant context stats based on the bet name."""
-    stats = {}
+    if bet_name.split(" ", 1)[0] in _OVER_UNDER_PREFIXES:
+        build_stats = _context_over_under
+    else:
+        build_stats = _CONTEXT_BUILDERS.get(bet_name)
+        if build_stats is None:
+            return {}
     try:
-        home_stats = processed_data.get('teams', {}).get('home', {}).get('statarea_analysis', {}).get('home', {}).get('last_15_games', {})
-        away_stats = processed_data.get('teams', {}).get('away', {}).get('statarea_analysis', {}).get('away', {}).get('last_15_games', {})
-        h2h_stats = processed_data.get('head_to_head', {}).get('summary', {})
-
-        if "Over" in bet_name or "Under" in bet_name:
-            stats['home_avg_scored_h15'] = home_stats.get('avg_goals_scored')
-            stats['away_avg_scored_a15'] = away_stats.get('avg_goals_scored')
-            stats['home_ovr25_pct_h15'] = home_stats.get('over_2_5_pct')
-            stats['away_ovr25_pct_a15'] = away_stats.get('over_2_5_pct')
-            stats['h2h_avg_goals'] = h2h_stats.get('avg_total_goals')
-            stats['h2h_ovr25_pct'] = h2h_stats.get('over_2_5_pct')
-        elif bet_name == "Home Win":
-            stats['home_win_pct_h15'] = home_stats.get('outcome_probabilities_1x2', {}).get('win')
-            stats['away_loss_pct_a15'] = away_stats.get('outcome_probabilities_1x2', {}).get('loss')
-            stats['h2h_home_win_pct'] = h2h_stats.get('home_team_win_pct')
-        elif bet_name == "Away Win":
-            stats['away_win_pct_a15'] = away_stats.get('outcome_probabilities_1x2', {}).get('win')
-            stats['home_loss_pct_h15'] = home_stats.get('outcome_probabilities_1x2', {}).get('loss')
-            stats['h2h_away_win_pct'] = h2h_stats.get('away_team_win_pct')
-        elif bet_name == "Draw":
-            stats['home_draw_pct_h15'] = home_stats.get('outcome_probabilities_1x2', {}).get('draw')
-            stats['away_draw_pct_a15'] = away_stats.get('outcome_probabilities_1x2', {}).get('draw')
-            stats['h2h_draw_pct'] = h2h_stats.get('draw_pct')
-        elif bet_name == "BTTS Yes":
-            stats['home_btts_pct_h15'] = home_stats.get('btts_pct')
-            stats['away_btts_pct_a15'] = away_stats.get('btts_pct')
-            stats['h2h_btts_pct'] = h2h_stats.get('btts_pct')
-        elif bet_name == "Home or Draw":
-            stats['home_win_draw_pct_h15'] = home_stats.get('outcome_probabilities_1x2', {}).get('win', 0) + home_stats.get('outcome_probabilities_1x2', {}).get('draw', 0)
-            stats['h2h_home_win_draw_pct'] = h2h_stats.get('home_team_win_pct', 0) + h2h_stats.get('draw_pct', 0)
-        elif bet_name == "Away or Draw":
-            stats['away_win_draw_pct_a15'] = away_stats.get('outcome_probabilities_1x2', {}).get('win', 0) + away_stats.get('outcome_probabilities_1x2', {}).get('draw', 0)
-            stats['h2h_away_win_draw_pct'] = h2h_stats.get('away_team_win_pct', 0) + h2h_stats.get('draw_pct', 0)
-        elif bet_name == "No Draw (Home or Away Win)":
-             stats['home_win_pct_h15'] = home_stats.get('outcome_probabilities_1x2', {}).get('win')
-             stats['away_win_pct_a15'] = away_stats.get('outcome_probabilities_1x2', {}).get('win')
-             stats['h2h_no_draw_pct'] = h2h_stats.get('home_team_win_pct', 0) + h2h_stats.get('away_team_win_pct', 0)
-
+        teams = processed_data.get('teams', _EMPTY)
+        home_stats = teams.get('home', _EMPTY).get('statarea_analysis', _EMPTY).get('home', _EMPTY).get('last_15_games', _EMPTY)
+        away_stats = teams.get('away', _EMPTY).get('statarea_analysis', _EMPTY).get('away', _EMPTY).get('last_15_games', _EMPTY)
+        h2h_stats = processed_data.get('head_to_head', _EMPTY).get('summary', _EMPTY)
+        # Fetched once here rather than once per stat in the builders
+        home_1x2 = home_stats.get('outcome_probabilities_1x2') or _EMPTY
+        away_1x2 = away_stats.get('outcome_probabilities_1x2') or _EMPTY
+
+        stats = build_stats(home_stats, away_stats, h2h_stats, home_1x2, away_1x2)
         # Remove None values
         return {k: v for k, v in stats.items() if v is not None}
     except Exception as e:
         logger.error(f"Error getting context stats for bet '{bet_name}': {e}")
         return {}
 
+def score_priced_bets(predicted_probs, implied_probs, predictability_weight):
+    """
+    Scores a fixture's priced bets in one NumPy pass (float64 arrays in, arrays out).
+    Returns (edges, value_ratios, base_scores, weighted_scores); the base score is
+    predicted probability plus edge, weighted by the match predictability.
+    """
+    edges = predicted_probs - implied_probs
+    value_ratios = predicted_probs / implied_probs
+    base_scores = predicted_probs + edges
+    return edges, value_ratios, base_scores, base_scores * predictability_weight
+
 def find_matched_bets(processed_data, odds_list):
     """
     Finds bets with predicted probability > 0.61, matches odds, adds context,
@@ -558,21 +693,25 @@ def find_matched_bets(processed_data, odds_list):
     predictability_reason = predictability_info.get("reason")
 
     # --- Calculate Predictability Weight ---
-    DEFAULT_PREDICTABILITY_WEIGHT = Decimal('0.75') # Assume 7.5/10 if missing
     predictability_weight = DEFAULT_PREDICTABILITY_WEIGHT
+    predictability_weight_float = float(DEFAULT_PREDICTABILITY_WEIGHT)
     if predictability_score_raw is not None:
         try:
-            # Convert raw score (potentially float/int) to Decimal and normalize (0-10 -> 0-1)
-            predictability_decimal = Decimal(str(predictability_score_raw))
+            # Convert raw score (potentially float/int/str) to float and normalize (0-10 -> 0-1)
+            predictability_float = float(predictability_score_raw)
+            if predictability_float != predictability_float: # NaN
+                raise ValueError("score is NaN")
             # Clamp between 0 and 10 before dividing
-            clamped_score = max(Decimal('0.0'), min(predictability_decimal, Decimal('10.0')))
-            predictability_weight = clamped_score / Decimal('10.0')
-            logger.debug(f"Using predictability score {predictability_score_raw} -> weight {predictability_weight:.3f}")
+            clamped_score = max(0.0, min(predictability_float, MAX_PREDICTABILITY_SCORE_FLOAT))
+            predictability_weight_float = clamped_score / MAX_PREDICTABILITY_SCORE_FLOAT
+            predictability_weight = quantize_decimal(predictability_weight_float, Q_PROB) # Stored with the bet
+            logger.debug("Using predictability score %s -> weight %.3f", predictability_score_raw, predictability_weight_float)
         except Exception as e:
             logger.warning(f"Could not process predictability score '{predictability_score_raw}'. Using default weight. Error: {e}")
             predictability_weight = DEFAULT_PREDICTABILITY_WEIGHT
+            predictability_weight_float = float(DEFAULT_PREDICTABILITY_WEIGHT)
     else:
-        logger.debug(f"Predictability score missing. Using default weight {predictability_weight}")
+        logger.debug("Predictability score missing. Using default weight %s", predictability_weight)
     # --- End Predictability Weight ---
 
 
@@ -581,16 +720,8 @@ def find_matched_bets(processed_data, odds_list):
         basic_probs = predictions_dict.get("basic_probabilities")
         if basic_probs:
             logger.debug("Using 'basic_probabilities' as 'top_probable_bets' was not found.")
-            top_bets = [{"bet": key, "probability": f"{value*100:.1f}%", "type": "Simple"}
+            top_bets = [{"bet": REMAP_BASIC.get(key, key), "probability": f"{value*100:.1f}%", "type": "Simple"}
                         for key, value in basic_probs.items()]
-            remap = {
-                "home_win": "Home Win", "draw": "Draw", "away_win": "Away Win", "over_0.5": "Over 0.5 Goals",
-                "over_1.5": "Over 1.5 Goals", "over_2.5": "Over 2.5 Goals", "over_3.5": "Over 3.5 Goals", "over_4.5": "Over 4.5 Goals",
-                "under_0.5": "Under 0.5 Goals", "under_1.5": "Under 1.5 Goals", "under_2.5": "Under 2.5 Goals", "under_3.5": "Under 3.5 Goals", "under_4.5": "Under 4.5 Goals",
-                "btts_yes": "BTTS Yes", "btts_no": "BTTS No", "home_draw": "Home or Draw", "away_draw": "Away or Draw", "home_away": "No Draw (Home or Away Win)"
-            }
-            for bet_dict in top_bets:
-                bet_dict["bet"] = remap.get(bet_dict["bet"], bet_dict["bet"])
         else:
             logger.warning(f"No prediction source found in fixture {processed_data.get('match_info',{}).get('id','N/A')}")
             return []
@@ -602,34 +733,36 @@ def find_matched_bets(processed_data, odds_list):
         logger.warning(f"No suitable predictions found in fixture {processed_data.get('match_info',{}).get('id','N/A')}")
         return []
 
-    quantize_final_score = Decimal('0.0001') # For final score rounding
+    find_odds = make_odds_lookup(build_odds_index(odds_list)) # Index once per fixture
 
+    # --- Clean Candidate List (simple bets with a name and probability) ---
+    candidates = []
     for prediction in top_bets:
         if not isinstance(prediction, dict): continue
-        bet_name = prediction.get("bet")
-        bet_type = prediction.get("type")
-        prob_str = prediction.get("probability")
-
-        if not bet_name or not prob_str:
+        if not prediction.get("bet") or not prediction.get("probability"):
             continue
-
+        if not isinstance(prediction["probability"], str):
+            logger.warning(f"Invalid probability type {type(prediction['probability'])} for bet '{prediction['bet']}'. Skipping.")
+            continue
+        bet_type = prediction.get("type")
         if bet_type is not None and bet_type != "Simple":
-             logger.debug(f"Skipping non-'Simple' bet type: '{bet_type}' for bet '{bet_name}'")
+             logger.debug("Skipping non-'Simple' bet type: '%s' for bet '%s'", bet_type, prediction.get("bet"))
              continue
+        candidates.append(prediction)
 
-        predicted_prob = parse_probability_string(prob_str)
-        if predicted_prob is None:
-            logger.warning(f"Could not parse prediction probability '{prob_str}' for bet '{bet_name}'. Skipping.")
-            continue
+    # --- Probability Filter (vectorized) ---
+    predicted_probs = parse_probability_array([prediction["probability"] for prediction in candidates])
+    passing_indices = np.flatnonzero(predicted_probs > PROBABILITY_THRESHOLD)
+    logger.debug("%d of %d candidate bets pass the > %s probability filter", len(passing_indices), len(candidates), PROBABILITY_THRESHOLD)
 
-        # --- Probability Filter ---
-        probability_threshold = Decimal('0.61')
-        if predicted_prob <= probability_threshold:
-            logger.debug(f"Skipping bet '{bet_name}' because PredProb {predicted_prob:.3f} is not > {probability_threshold}")
-            continue
+    priced_bets = [] # (bet_name, odds_str)
+    priced_probs = []
+    priced_implied = []
+    for i in passing_indices:
+        bet_name = candidates[i]["bet"]
 
         # --- Odds Matching ---
-        odds_str = find_matching_odds(bet_name, "Simple", odds_list)
+        odds_str = find_odds(bet_name, "Simple")
         if odds_str is None:
              continue
 
@@ -637,51 +770,58 @@ def find_matched_bets(processed_data, odds_list):
         if implied_prob is None:
              logger.warning(f"Could not calculate implied probability from odds '{odds_str}' for bet '{bet_name}'. Skipping.")
              continue
+        if implied_prob <= 0:
+             continue
 
-        # --- Calculations and Context ---
-        try:
-            if predicted_prob <= 0 or implied_prob <= 0:
-                 continue
+        priced_bets.append((bet_name, odds_str))
+        priced_probs.append(predicted_probs[i])
+        priced_implied.append(implied_prob)
 
-            value_ratio = predicted_prob / implied_prob
-            edge = predicted_prob - implied_prob
-            quantize_edge = Decimal('0.001')
-            odds_decimal = Decimal(str(odds_str)).quantize(quantize_edge, ROUND_HALF_UP)
+    if not priced_bets:
+        return matched_bets
 
-            # --- Calculate Weighted Score ---
-            base_score_component = predicted_prob + edge
-            score = (base_score_component * predictability_weight).quantize(quantize_final_score, ROUND_HALF_UP)
-            # --- End Weighted Score ---
+    # --- Weighted Score Kernel (one vectorized pass over the fixture's priced bets) ---
+    edges, value_ratios, base_scores, scores = score_priced_bets(
+        np.asarray(priced_probs, dtype=np.float64), np.asarray(priced_implied, dtype=np.float64), predictability_weight_float)
+
+    for (bet_name, odds_str), predicted_prob, implied_prob, edge, value_ratio, base_score_component, raw_score in zip(
+            priced_bets, priced_probs, priced_implied, edges.tolist(), value_ratios.tolist(), base_scores.tolist(), scores.tolist()):
+        predicted_prob = float(predicted_prob)
+        # --- Context and Output ---
+        try:
+            odds_decimal = Decimal(str(odds_str)).quantize(Q_EDGE, ROUND_HALF_UP)
+            score = quantize_decimal(raw_score, Q_PROB)
 
 
             # Get Context Stats
             context_stats = get_context_stats(processed_data, bet_name)
 
-            logger.debug(f"  Bet Check (>0.61): '{bet_name}' | Weighted Score: {score} (Base: {base_score_component:.3f}, Weight: {predictability_weight:.3f}) | Pred Prob: {predicted_prob:.3f} | Odds: {odds_decimal} | Impl Prob: {implied_prob:.3f} | Edge: {edge:.3f}")
+            logger.debug("  Bet Check (>0.61): '%s' | Weighted Score: %s (Base: %.3f, Weight: %.3f) | Pred Prob: %.3f | Odds: %s | Impl Prob: %.3f | Edge: %.3f",
+                         bet_name, score, base_score_component, predictability_weight_float, predicted_prob, odds_decimal, implied_prob, edge)
 
             match_data = {
                 "bet": bet_name,
                 "score": score, # This is now the weighted score
-                "predicted_prob": predicted_prob,
+                "predicted_prob": quantize_decimal(predicted_prob, Q_PROB),
                 "odds": odds_decimal,
-                "implied_prob": implied_prob.quantize(quantize_edge, ROUND_HALF_UP),
-                "edge": edge,
-                "value_ratio": value_ratio.quantize(quantize_edge, ROUND_HALF_UP),
+                "implied_prob": quantize_decimal(implied_prob, Q_EDGE),
+                "edge": quantize_decimal(edge, Q_PROB),
+                "value_ratio": quantize_decimal(value_ratio, Q_EDGE),
                 "context_stats": context_stats,
                 "match_predictability_score": predictability_score_raw, # Store the original score
                 "match_predictability_weight": predictability_weight, # Store the calculated weight
                 "match_predictability_reason": predictability_reason
             }
-            match_data = {k: v for k, v in match_data.items() if v is not None}
+            # Only the fixture-level predictability fields can be None
+            if predictability_score_raw is None: del match_data["match_predictability_score"]
+            if predictability_reason is None: del match_data["match_predictability_reason"]
 
 
             logger.info(f"  MATCH FOUND (>0.61 Pred): Bet='{bet_name}', Score={score:.4f}, PredProb={predicted_prob:.1%}, Odds={odds_decimal}, Edge={edge:.1%}")
             matched_bets.append(match_data)
 
-        except Exception as e:
-             logger.error(f"Error during context/score calculation for bet '{bet_name}': {e}")
-             import traceback
-             traceback.print_exc() # More detail on calculation errors
+        except Exception:
+             logger.exception("Error during context/score calculation for bet '%s'", bet_name) # Includes the traceback
              continue
 
     return matched_bets
@@ -708,7 +848,7 @@ def process_combined_selections(processed_data, odds_list):
     fixture_id_log = processed_data.get('fixture_id') or processed_data.get('match_info', {}).get('id', 'N/A')
 
     if not combined_selections or not isinstance(combined_selections, list):
-        logger.debug(f"No 'top_n_combined_selections' list found or list is empty for fixture {fixture_id_log}.")
+        logger.debug("No 'top_n_combined_selections' list found or list is empty for fixture %s.", fixture_id_log)
         return processed_data # Return unchanged (no modifications needed)
 
     if not odds_list:
@@ -723,12 +863,9 @@ def process_combined_selections(processed_data, odds_list):
                  selection_dict.pop("odd_source", None) # Remove calculation source flag
         return processed_data # Return unchanged (except potential clearing)
 
-    logger.debug(f"Processing {len(combined_selections)} combined selections for odds in fixture {fixture_id_log}...")
-    quantize_edge = Decimal('0.001')
-    quantize_ratio = Decimal('0.001')
-    quantize_odds = Decimal('0.01') # Standard for odds
-    quantize_prob = Decimal('0.0001') # Precision for probabilities
+    logger.debug("Processing %d combined selections for odds in fixture %s...", len(combined_selections), fixture_id_log)
 
+    find_odds = make_odds_lookup(build_odds_index(odds_list)) # Index once per fixture
     updated_count = 0
     for selection_dict in combined_selections: # Iterate through the list to modify dicts in place
         if not isinstance(selection_dict, dict): continue
@@ -743,13 +880,13 @@ def process_combined_selections(processed_data, odds_list):
             logger.warning(f"Skipping combined selection due to missing 'selection' or 'probability': {selection_dict}")
             continue
 
-        # Ensure predicted_prob is Decimal
+        # Ensure predicted_prob is a Decimal rounded to 4 dp before any metric uses it
         predicted_prob = None
         try:
-            # It should already be Decimal if loaded correctly, but handle str just in case
+            # It is Decimal if loaded correctly, but handle str just in case
             if isinstance(predicted_prob_raw, str):
                 if '%' in predicted_prob_raw:
-                     predicted_prob = parse_probability_string(predicted_prob_raw)
+                     predicted_prob = Decimal(predicted_prob_raw.strip('%')) / _DECIMAL_HUNDRED
                 else:
                      predicted_prob = Decimal(predicted_prob_raw)
             elif isinstance(predicted_prob_raw, (Decimal, float, int)):
@@ -757,28 +894,28 @@ def process_combined_selections(processed_data, odds_list):
             else:
                 raise TypeError(f"Unexpected type for probability: {type(predicted_prob_raw)}")
 
-            if predicted_prob is None: raise ValueError("Probability became None after conversion attempt")
-            predicted_prob = predicted_prob.quantize(quantize_prob, ROUND_HALF_UP) # Ensure consistent precision
+            predicted_prob = predicted_prob.quantize(Q_PROB, ROUND_HALF_UP) # Ensure consistent precision
 
         except Exception as e:
-            logger.error(f"Could not ensure predicted probability '{predicted_prob_raw}' is Decimal for selection '{bet_name}'. Skipping. Error: {e}")
+            logger.error(f"Could not convert predicted probability '{predicted_prob_raw}' to Decimal for selection '{bet_name}'. Skipping. Error: {e}")
             # Clear fields if conversion fails
             selection_dict.pop("odd", None); selection_dict.pop("implied_prob", None); selection_dict.pop("edge", None); selection_dict.pop("value_ratio", None); selection_dict.pop("odd_source", None)
             continue
 
         # --- Find Odds ---
         # Attempt 1: Find the direct combined odd
-        odds_str = find_matching_odds(bet_name, "Combined", odds_list)
+        odds_str = find_odds(bet_name, "Combined")
         odd_source = "Direct Match" if odds_str is not None else None
 
         # Attempt 2: If direct combined odd not found, try calculating from individual parts
         if odds_str is None and " and " in bet_name:
-             logger.debug(f"Direct odd not found for '{bet_name}'. Attempting calculation from individual parts.")
-             parts = [p.strip() for p in bet_name.split(" and ")]
-             if len(parts) == 2:
-                 part1, part2 = parts
-                 odd_str1 = find_matching_odds(part1, "Simple", odds_list) # Treat parts as simple bets
-                 odd_str2 = find_matching_odds(part2, "Simple", odds_list)
+             logger.debug("Direct odd not found for '%s'. Attempting calculation from individual parts.", bet_name)
+             part1, _, part2 = bet_name.partition(" and ")
+             if " and " not in part2: # Exactly two parts
+                 part1 = part1.strip()
+                 part2 = part2.strip()
+                 odd_str1 = find_odds(part1, "Simple") # Treat parts as simple bets
+                 odd_str2 = find_odds(part2, "Simple")
 
                  if odd_str1 is not None and odd_str2 is not None:
                      try:
@@ -802,18 +939,19 @@ def process_combined_selections(processed_data, odds_list):
 
         # --- Process if odd was found (either directly or calculated) ---
         if odds_str is None:
-            logger.debug(f"No matching or calculable odds found for selection: '{bet_name}'. Status: {odd_source or 'Not Found'}")
+            logger.debug("No matching or calculable odds found for selection: '%s'. Status: %s", bet_name, odd_source or 'Not Found')
             # Remove old values if they exist - only touch these keys
             selection_dict.pop("odd", None); selection_dict.pop("implied_prob", None); selection_dict.pop("edge", None); selection_dict.pop("value_ratio", None); selection_dict.pop("odd_source", None)
             continue
 
         # --- Calculate Metrics ---
-        implied_prob = calculate_implied_probability(odds_str)
+        # Metrics stay in Decimal so the 4 dp/3 dp rounding is exact (float ties would round down)
+        implied_prob = calculate_implied_probability_decimal(odds_str)
         if implied_prob is None:
             logger.warning(f"Could not calculate implied probability from odd '{odds_str}' (Source: {odd_source}) for bet '{bet_name}'. Skipping metrics.")
             # Store odd even if implied prob fails, but clear others
             try:
-                 selection_dict["odd"] = Decimal(str(odds_str)).quantize(quantize_odds, ROUND_HALF_UP)
+                 selection_dict["odd"] = Decimal(str(odds_str)).quantize(Q_ODDS, ROUND_HALF_UP)
                  selection_dict["odd_source"] = odd_source # Store source info
             except Exception:
                  selection_dict.pop("odd", None)
@@ -822,10 +960,12 @@ def process_combined_selections(processed_data, odds_list):
             continue
 
         try:
-            odds_decimal = Decimal(str(odds_str)).quantize(quantize_odds, ROUND_HALF_UP)
-            implied_prob_quant = implied_prob.quantize(quantize_prob, ROUND_HALF_UP)
-            edge = (predicted_prob - implied_prob).quantize(quantize_edge, ROUND_HALF_UP)
-            value_ratio = (predicted_prob / implied_prob).quantize(quantize_ratio, ROUND_HALF_UP) if implied_prob > 0 else Decimal('Infinity')
+            odds_value = Decimal(str(odds_str))
+            odds_decimal = odds_value.quantize(Q_ODDS, ROUND_HALF_UP)
+            implied_prob_quant = implied_prob.quantize(Q_PROB, ROUND_HALF_UP)
+            edge = (predicted_prob - implied_prob).quantize(Q_EDGE, ROUND_HALF_UP)
+            # prob / (1 / odds) == prob * odds; the product is exact, the inexact quotient can miss half-up ties
+            value_ratio = (predicted_prob * odds_value).quantize(Q_EDGE, ROUND_HALF_UP)
 
             # --- Update the dictionary IN PLACE ---
             selection_dict["odd"] = odds_decimal
@@ -836,7 +976,7 @@ def process_combined_selections(processed_data, odds_list):
             # --- End Update ---
 
             updated_count += 1
-            logger.debug(f"Metrics updated for '{bet_name}' using odd {odds_decimal} (Source: {odd_source}). Edge: {edge:.3f}")
+            logger.debug("Metrics updated for '%s' using odd %s (Source: %s). Edge: %.3f", bet_name, odds_decimal, odd_source, edge)
 
         except Exception as e:
             logger.error(f"Error calculating metrics for selection '{bet_name}' with odd '{odds_str}': {e}")
@@ -850,48 +990,110 @@ def process_combined_selections(processed_data, odds_list):
     # Return the SAME dictionary object that was passed in, now potentially modified
     return processed_data
 
+def _decimal_to_string(data):
+    if data.is_infinite():
+        return 'Infinity'
+    # Use appropriate precision based on value (simple heuristic)
+    if data.is_nan(): return 'NaN' # Handle NaN just in case
+    if not data: return "0.0000" # Decimal zero (either sign) is falsy
+    abs_data = data.copy_abs()
+    if abs_data > _DECIMAL_HUNDRED: # Large number, likely not needing high precision
+        return f"{data:.2f}"
+    elif abs_data >= _DECIMAL_ONE: # Odds or ratios > 1
+         return f"{data.quantize(Q_ODDS, ROUND_HALF_UP):.2f}"
+    elif abs_data > _DECIMAL_TINY: # Probabilities, edges, small ratios
+        return f"{data.quantize(Q_PROB, ROUND_HALF_UP):.4f}"
+    else: # Very small numbers, maybe use scientific notation or fixed small value
+         return f"{data:.4E}" # Example: Scientific notation
+
+def _float_to_string(data):
+     # Format floats nicely
+     if data.is_integer(): return f"{data:.1f}"
+     if abs(data) < 1 and abs(data) > 1e-4 : return f"{data:.4f}"
+     elif abs(data) < 10: return f"{data:.3f}"
+     else: return f"{data:.2f}"
+
+def _unchanged(data):
+    return data
+
+def _isoformat(data): # Handle dates/datetimes if they appear
+    return data.isoformat()
+
+class _NonFiniteFloat(float):
+    """
+    NaN/Infinity literal read by the stdlib batch parser. orjson writes plain non-finite
+    floats as null, but hands float subclasses to `default`, which formats them like
+    convert_decimals_to_strings does ("nan", "inf").
+    """
+    __slots__ = ()
+
+# Exact-type dispatch for convert_decimals_to_strings; subclasses are resolved via _CONVERTER_BASES
+_CONVERTERS = {
+    list: lambda data: [convert_decimals_to_strings(item) for item in data],
+    dict: lambda data: {k: convert_decimals_to_strings(v) for k, v in data.items()},
+    Decimal: _decimal_to_string,
+    float: _float_to_string, _NonFiniteFloat: _float_to_string,
+    int: _unchanged, str: _unchanged, bool: _unchanged, type(None): _unchanged,
+    datetime: _isoformat, date: _isoformat,
+}
+_CONVERTER_BASES = (list, dict, Decimal, float, int, str, date) # isinstance order for subclasses
+
 def convert_decimals_to_strings(data):
     """Recursively convert Decimal objects and format numbers for JSON serialization."""
-    if isinstance(data, list):
-        return [convert_decimals_to_strings(item) for item in data]
-    elif isinstance(data, dict):
-        return {k: convert_decimals_to_strings(v) for k, v in data.items()}
-    elif isinstance(data, Decimal):
-        if data.is_infinite():
-            return 'Infinity'
-        # Use appropriate precision based on value (simple heuristic)
-        if data.is_nan(): return 'NaN' # Handle NaN just in case
-        abs_data = data.copy_abs()
-        if abs_data == 0: return "0.0000"
-        if abs_data > 100: # Large number, likely not needing high precision
-            return f"{data:.2f}"
-        elif abs_data >= Decimal('1.0'): # Odds or ratios > 1
-             return f"{data.quantize(Decimal('0.01'), ROUND_HALF_UP):.2f}"
-        elif abs_data > Decimal('0.000001'): # Probabilities, edges, small ratios
-            return f"{data.quantize(Decimal('0.0001'), ROUND_HALF_UP):.4f}"
-        else: # Very small numbers, maybe use scientific notation or fixed small value
-             return f"{data:.4E}" # Example: Scientific notation
-    elif isinstance(data, float):
-         # Format floats nicely
-         if data.is_integer(): return f"{data:.1f}"
-         if abs(data) < 1 and abs(data) > 1e-4 : return f"{data:.4f}"
-         elif abs(data) < 10: return f"{data:.3f}"
-         else: return f"{data:.2f}"
-    elif isinstance(data, (int, str, bool)) or data is None:
-        return data
-    elif isinstance(data, (datetime, date)): # Handle dates/datetimes if they appear
-        return data.isoformat()
-    else:
-        # Fallback for other types (shouldn't happen often with JSON load)
-        # logger.warning(f"Converting unexpected type {type(data)} to string: {str(data)}")
-        return str(data)
+    convert = _CONVERTERS.get(type(data))
+    if convert is None:
+        # Subclass of a known type, or a fallback to str for other types (shouldn't happen often with JSON load)
+        convert = next((_CONVERTERS[base] for base in _CONVERTER_BASES if isinstance(data, base)), str)
+    return convert(data)
+
+def _floats_to_decimals(data):
+    """Replaces floats with Decimal in place, matching json.load(parse_float=Decimal)."""
+    if type(data) is dict:
+        for k, v in data.items():
+            if type(v) is float: data[k] = Decimal(repr(v))
+            elif type(v) in (dict, list): _floats_to_decimals(v)
+    elif type(data) is list:
+        for i, v in enumerate(data):
+            if type(v) is float: data[i] = Decimal(repr(v))
+            elif type(v) in (dict, list): _floats_to_decimals(v)
+    return data
+
+def _parse_batch_json(filepath):
+    """
+    Parses the batch file with every float as Decimal. Uses orjson plus a Decimal
+    post-pass when available, since json's parse_float hook is far slower.
+    """
+    if orjson is not None:
+        try:
+            return _floats_to_decimals(read_json_file(filepath))
+        except orjson.JSONDecodeError:
+            # NaN/Infinity literals (json.dump allows them) are only accepted by the stdlib parser
+            logger.debug("orjson could not parse %s; retrying with the stdlib parser.", filepath)
+    with open(filepath, 'r') as f:
+        return json.load(f, parse_float=Decimal, parse_constant=_NonFiniteFloat) # Use Decimal for precision
+
+def _orjson_default(data):
+    """orjson `default` hook: formats Decimals (and other non-native types) like convert_decimals_to_strings."""
+    if type(data) is Decimal:
+        return _decimal_to_string(data)
+    return convert_decimals_to_strings(data)
+
+def dumps_batch_json(data):
+    """
+    Encodes batch data as UTF-8 JSON indented by two spaces, with Decimals formatted as in
+    convert_decimals_to_strings. With orjson the formatting runs inside the encoder, so the
+    tree is walked once instead of twice. Loaded batch data holds its numbers as Decimal, and
+    NaN/Infinity as _NonFiniteFloat, so orjson never writes a float of its own.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=_orjson_default, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return _pretty_encode(convert_decimals_to_strings(data)).encode()
 
 # --- Function to load the single batch file ---
 def load_batch_prediction_data(filepath):
     """Loads the entire batch prediction JSON data from a file."""
     try:
-        with open(filepath, 'r') as f:
-            data = json.load(f, parse_float=Decimal) # Use Decimal for precision
+        data = _parse_batch_json(filepath)
         logger.info(f"Successfully loaded batch data from {filepath}")
         if isinstance(data, list):
             return data, "list"
@@ -916,7 +1118,151 @@ def load_batch_prediction_data(filepath):
         logger.error(f"Unexpected error loading {filepath}: {e}")
         return None, None
 
+# --- Streaming access for very large batch files ---
+def detect_batch_format(filepath):
+    """Returns "list" or "dict" from the first JSON token of the batch file, or None."""
+    with open(filepath, 'rb') as f:
+        while True:
+            chunk = f.read(4096)
+            if not chunk:
+                return None
+            stripped = chunk.lstrip()
+            if stripped:
+                return {b'['[0]: "list", b'{'[0]: "dict"}.get(stripped[0])
+
+def has_non_finite_literals(filepath):
+    """
+    True if the batch file may contain NaN/Infinity literals, which json.dump writes but
+    ijson rejects. A plain byte search: a match inside a string only disables streaming.
+    """
+    with open(filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return mm.find(b"NaN") != -1 or mm.find(b"Infinity") != -1
+
+def stream_batch_prediction_data(filepath, data_format):
+    """
+    Yields (key_or_index, match_data) one fixture at a time with ijson, so only the
+    entries currently being processed are held in memory. Non-integer numbers come back
+    as Decimal, matching load_batch_prediction_data. The file must not contain
+    NaN/Infinity literals (see has_non_finite_literals).
+    """
+    with open(filepath, 'rb') as f:
+        if data_format == "list":
+            yield from enumerate(ijson.items(f, 'item'))
+        else:
+            yield from ijson.kvitems(f, '')
+
+def write_batch_stream(filepath, data_format, entries):
+    """
+    Writes (key_or_index, match_data) pairs to `filepath` as they arrive, producing the
+    same layout as write_json_file. Writes to a temporary file first and replaces the
+    original only once every entry has been written.
+    """
+    tmp_path = filepath + ".tmp"
+    open_char, close_char = (b"[", b"]") if data_format == "list" else (b"{", b"}")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(open_char)
+            separator = b"\n  "
+            wrote_any = False
+            for key_or_index, match_data in entries:
+                entry_json = dumps_batch_json(match_data).replace(b"\n", b"\n  ")
+                if data_format == "dict":
+                    entry_json = _fast_dumps(str(key_or_index)) + b": " + entry_json
+                f.write(separator + entry_json)
+                separator = b",\n  "
+                wrote_any = True
+            f.write((b"\n" if wrote_any else b"") + close_char)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def write_json_file(filepath, data):
+    """
+    Writes batch data to `filepath` via dumps_batch_json. The data is written to a temporary
+    file and atomically renamed over the original, so a failed write leaves it intact.
+    """
+    tmp_path = filepath + ".tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(dumps_batch_json(data))
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+# --- Function to find the fixture ID stored inside a match entry ---
+POTENTIAL_ID_PATHS = [
+    ['fixture_id'], ['fixtureId'], ['id'], # Common top-level keys
+    ['match_info', 'id'], # Inside 'match_info'
+    ['fixture', 'id'] # Inside 'fixture'
+]
+
+_PATH_MISS = (KeyError, TypeError, IndexError) # Raised by a path accessor when its path is absent
+
+def make_path_accessor(path):
+    """
+    Prebuilds a getter for a nested key path (e.g. ['match_info', 'id']) from operator.itemgetter
+    steps. The getter raises one of _PATH_MISS when any step of the path is missing.
+    """
+    getters = tuple(operator.itemgetter(key) for key in path)
+    if len(getters) == 1:
+        return getters[0]
+    return lambda data: functools.reduce(lambda value, getter: getter(value), getters, data)
+
+_ID_ACCESSORS = tuple((make_path_accessor(path), path) for path in POTENTIAL_ID_PATHS)
+
+def find_internal_fixture_id(match_data):
+    """Returns (fixture_id, path) for the first ID path present in the match data, or (None, None)."""
+    for access, path in _ID_ACCESSORS:
+        try:
+            fixture_id = access(match_data)
+        except _PATH_MISS:
+            continue
+        if fixture_id is not None:
+            return fixture_id, path
+    return None, None
+
 # --- Function to extract date (Further Revised Search Logic) ---
+@functools.lru_cache(maxsize=4096)
+def parse_date_simple(date_str):
+    """
+    Formats a raw date string as 'YYYY-MM-DD', or returns None if it cannot be parsed.
+    Cached on the raw string: fixtures in a batch share a handful of kickoff times.
+    """
+    # Fast path: ISO-shaped strings only need their (validated) date prefix
+    date_part = iso_date_prefix(date_str)
+    if date_part and is_valid_calendar_date(date_part):
+        return date_part
+    try:
+        # Try parsing ISO format first
+        return datetime.fromisoformat(date_str.replace('Z', '+00:00')).strftime('%Y-%m-%d')
+    except ValueError:
+        pass
+    try:
+        # Fallback to parsing just YYYY-MM-DD
+        return datetime.strptime(date_str.split('T')[0], '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        return None
+
+# Paths tried (in order) for a fixture ID to show in date-lookup logs
+_LOG_ID_PATHS = (('fixture_id',), ('id',), ('match_info', 'id'), ('fixture', 'id'))
+
+# Potential paths to the date string, with a description of each source
+POTENTIAL_DATE_PATHS = (
+    (('date',), "top-level 'date'"),
+    (('match_date',), "top-level 'match_date'"),
+    (('fixture_date',), "top-level 'fixture_date'"),
+    (('match_info', 'date'), "'match_info.date'"),
+    (('match_info', 'match_date'), "'match_info.match_date'"),
+    (('fixture', 'date'), "'fixture.date'"),
+    (('bookmakers', 0, 'fixture', 'date'), "'bookmakers[0].fixture.date'")
+)
+_LOG_ID_ACCESSORS = tuple(make_path_accessor(path) for path in _LOG_ID_PATHS)
+_DATE_ACCESSORS = tuple((make_path_accessor(path), source_desc) for path, source_desc in POTENTIAL_DATE_PATHS)
+
 def get_match_date_simple(match_data):
     """
     Extracts and formats the match date from match data.
@@ -927,45 +1273,28 @@ def get_match_date_simple(match_data):
     fixture_id_log = match_data.get('fixture_id', 'N/A') # Default to N/A
 
     # Try to get a better fixture ID for logging if available
-    potential_id_paths = [['fixture_id'], ['id'], ['match_info', 'id'], ['fixture', 'id']]
-    for path in potential_id_paths:
-        temp_data = match_data
+    for access in _LOG_ID_ACCESSORS:
         try:
-            for key in path: temp_data = temp_data[key]
-            if temp_data is not None:
-                fixture_id_log = temp_data
-                break
-        except (TypeError, KeyError, IndexError): continue
-
-    logger.debug(f"--- Finding date for fixture {fixture_id_log} ---")
-
-    # Define potential paths to the date string
-    potential_date_paths = [
-        (['date'], "top-level 'date'"),
-        (['match_date'], "top-level 'match_date'"),
-        (['fixture_date'], "top-level 'fixture_date'"),
-        (['match_info', 'date'], "'match_info.date'"),
-        (['match_info', 'match_date'], "'match_info.match_date'"),
-        (['fixture', 'date'], "'fixture.date'"),
-        (['bookmakers', 0, 'fixture', 'date'], "'bookmakers[0].fixture.date'")
-    ]
+            temp_data = access(match_data)
+        except _PATH_MISS:
+            continue
+        if temp_data is not None:
+            fixture_id_log = temp_data
+            break
+
+    logger.debug("--- Finding date for fixture %s ---", fixture_id_log)
 
     # 1. Try finding the date string using the defined paths
-    for path, source_desc in potential_date_paths:
-        temp_data = match_data
-        found = True
+    for access, source_desc in _DATE_ACCESSORS:
         try:
-            for key in path:
-                if isinstance(temp_data, dict): temp_data = temp_data.get(key)
-                elif isinstance(temp_data, list) and isinstance(key, int) and len(temp_data) > key: temp_data = temp_data[key]
-                else: found = False; break
-            if found and temp_data is not None:
-                date_str = str(temp_data) # Ensure it's a string
-                date_source = source_desc
-                logger.debug(f"  Found potential date '{date_str}' from source: {date_source}")
-                break # Date found, exit search loop
-        except (TypeError, IndexError, KeyError):
+            temp_data = access(match_data)
+        except _PATH_MISS:
             continue # Path invalid or doesn't exist
+        if temp_data is not None:
+            date_str = str(temp_data) # Ensure it's a string
+            date_source = source_desc
+            logger.debug("  Found potential date '%s' from source: %s", date_str, date_source)
+            break # Date found, exit search loop
 
     # 2. --- Fallback to extracting date from file_path ---
     if date_str is None:
@@ -978,36 +1307,160 @@ def get_match_date_simple(match_data):
                 datetime.strptime(date_part, '%Y-%m-%d') # Validate format YYYY-MM-DD
                 date_str = date_part # Use the extracted date string
                 date_source = f"file_path extraction ('{filename}')"
-                logger.debug(f"  SUCCESS: Found date '{date_str}' from {date_source}")
+                logger.debug("  SUCCESS: Found date '%s' from %s", date_str, date_source)
             except (IndexError, ValueError, TypeError) as e:
                 logger.warning(f"  FAILED: Could not extract valid date from file_path '{file_path}'. Error: {e}")
                 date_str = None # Ensure it remains None if extraction fails
         else:
-            logger.debug(f"  SKIPPED: 'file_path' key missing or not a string ('{type(file_path)}').")
+            logger.debug("  SKIPPED: 'file_path' key missing or not a string ('%s').", type(file_path))
 
     # 3. --- Try parsing the found date string (if any) ---
     if date_str:
-        try:
-            # Try parsing ISO format first
-            date_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-            formatted_date = date_obj.strftime('%Y-%m-%d')
-            logger.debug(f"  Successfully parsed date '{date_str}' (source: {date_source}) -> {formatted_date}")
+        formatted_date = parse_date_simple(date_str)
+        if formatted_date:
+            logger.debug("  Successfully parsed date '%s' (source: %s) -> %s", date_str, date_source, formatted_date)
             return formatted_date
-        except ValueError:
-            try:
-                # Fallback to parsing just YYYY-MM-DD
-                date_obj = datetime.strptime(date_str.split('T')[0], '%Y-%m-%d')
-                formatted_date = date_obj.strftime('%Y-%m-%d')
-                logger.debug(f"  Successfully parsed date '{date_str}' (source: {date_source}) -> {formatted_date} (using YYYY-MM-DD parse)")
-                return formatted_date
-            except ValueError:
-                logger.error(f"  FAILED PARSING: Could not parse potential date string '{date_str}' (found via {date_source}) for fixture {fixture_id_log}")
-                return None # Parsing failed even though we found a string
+        logger.error(f"  FAILED PARSING: Could not parse potential date string '{date_str}' (found via {date_source}) for fixture {fixture_id_log}")
+        return None # Parsing failed even though we found a string
     else:
         # This log means neither direct key search nor file_path extraction yielded a date string
         logger.warning(f"Could not find a recognizable date key/value OR extract from file_path for fixture {fixture_id_log}")
         return None
 
+# --- Per-fixture batch processing ---
+def get_selections_for_diff(match_data):
+    """Returns the entry's combined selections (match_analysis first, then top level), or []."""
+    match_analysis = match_data.get("match_analysis")
+    return (match_analysis.get("top_n_combined_selections") if match_analysis else None) or \
+        match_data.get("top_n_combined_selections", [])
+
+def selections_snapshot(selections):
+    """
+    Copies the top-level fields of each combined selection so a later comparison can tell whether
+    process_combined_selections changed them. Decimals are kept in their written (string) form,
+    so an odd re-derived from a previously written '3.30' compares as unchanged.
+    """
+    if not isinstance(selections, list):
+        return selections
+    return [{k: (str(v) if type(v) is Decimal else v) for k, v in selection.items()} if isinstance(selection, dict) else selection
+            for selection in selections]
+
+def process_batch_entry(key_or_index, match_data, data_format, bookmaker, prefetched_odds=None):
+    """
+    Finds the fixture ID and date of one batch entry, fetches its odds and updates its combined selections.
+    Returns (key_or_index, match_data, status) where status is "updated", "unchanged" or "error".
+    """
+    fixture_id = None
+
+    # --- Find Fixture ID (Revised Logic) ---
+    if data_format == "list":
+        fixture_id, path = find_internal_fixture_id(match_data)
+        if fixture_id is not None:
+            logger.debug("Found fixture ID %s using path %s in list item %d", fixture_id, path, key_or_index + 1)
+
+    elif data_format == "dict":
+         fixture_id = key_or_index # Key is the primary ID
+         # Verify against internal ID
+         internal_id, path = find_internal_fixture_id(match_data)
+         if internal_id and internal_id != fixture_id and str(internal_id) != str(fixture_id): # Stringify only when the raw values differ (e.g. int ID vs str key)
+              logger.warning(f"Dict key '{fixture_id}' differs from internal ID '{internal_id}' found at path {path}. Using key '{fixture_id}'.")
+    # --- End Fixture ID Finding ---
+
+    display_id = f"fixture {fixture_id}" if fixture_id else f"entry {key_or_index+1 if isinstance(key_or_index, int) else key_or_index}"
+
+    if not fixture_id:
+        logger.warning(f"Skipping {display_id}: Failed to find fixture ID in expected locations.")
+        return key_or_index, match_data, "error"
+
+    logger.debug("\n--- Processing %s ---", display_id)
+    match_date_simple = get_match_date_simple(match_data) # Use the MOST refined date finder
+    if not match_date_simple:
+        logger.warning(f"Skipping {display_id}: Could not determine valid date for odds lookup.")
+        return key_or_index, match_data, "error"
+
+    # --- Try getting odds and processing ---
+    try:
+        odds_list = get_odds_from_db(str(fixture_id), match_date_simple, bookmaker, prefetched=prefetched_odds)
+
+        selections_before = selections_snapshot(get_selections_for_diff(match_data))
+        processed_match_data = process_combined_selections(match_data, odds_list) # Modifies match_data in place
+        selections_after = selections_snapshot(get_selections_for_diff(processed_match_data))
+
+        if selections_before != selections_after:
+             logger.info(f"Updates applied to {display_id}.") # Changed log level to INFO for updates
+             return key_or_index, processed_match_data, "updated"
+        return key_or_index, processed_match_data, "unchanged"
+
+    except Exception:
+         logger.exception("Unhandled error during processing loop for %s", display_id)
+         return key_or_index, match_data, "error"
+
+def _init_process_worker():
+    """Worker process initializer: odds come with each task, so the inherited DB client is never used."""
+    global _db_lookups_allowed
+    _db_lookups_allowed = False
+
+def _process_entry_in_worker(entry, entry_odds, data_format, bookmaker):
+    return process_batch_entry(entry[0], entry[1], data_format, bookmaker, entry_odds)
+
+def _odds_per_entry(entries, data_format, bookmaker, prefetched_odds):
+    """
+    Splits preloaded odds into one {fixture_id_int: bets} dict per entry for worker
+    processes, fetching fixtures the preload missed here in the parent, so each task
+    carries only its own odds and workers never query MongoDB.
+    """
+    odds_per_entry = []
+    for key_or_index, match_data in entries:
+        fixture_id = find_internal_fixture_id(match_data)[0] if data_format == "list" else key_or_index
+        try:
+            fixture_id_int = int(str(fixture_id)) # Same conversion as get_odds_from_db
+        except ValueError:
+            odds_per_entry.append({}) # Rejected by the worker before any lookup
+            continue
+        if fixture_id_int in prefetched_odds:
+            bets = prefetched_odds[fixture_id_int]
+        else:
+            try:
+                bets = _fetch_bookmaker_bets(fixture_id_int, bookmaker)
+            except Exception:
+                logger.exception("Error fetching/parsing odds from MongoDB via db_manager for fixture_id %s", fixture_id_int)
+                bets = None
+        odds_per_entry.append({fixture_id_int: bets})
+    return odds_per_entry
+
+def preload_odds_for_entries(entries, data_format, bookmaker):
+    """Preloads odds (see preload_odds_for_fixtures) for a list of (key_or_index, match_data) entries."""
+    if data_format == "list":
+        fixture_ids = [find_internal_fixture_id(match_data)[0] for _, match_data in entries]
+    else:
+        fixture_ids = [key for key, _ in entries]
+    return preload_odds_for_fixtures(fixture_ids, bookmaker)
+
+def process_batch_entries(entries, data_format, bookmaker, workers=BATCH_WORKERS, process_pool=None, prefetched_odds=None):
+    """
+    Processes a list of (key_or_index, match_data) entries: preloads their odds with one
+    query (unless `prefetched_odds` is given), then runs process_batch_entry on them
+    concurrently (odds lookups for non-prefetched fixtures are I/O-bound). With a
+    `process_pool` (a ProcessPoolExecutor using _init_process_worker, reused across calls)
+    the CPU-bound pricing runs in worker processes instead of threads; entries are then
+    processed on copies, so callers must use the returned match data. Returns the results
+    in input order.
+    """
+    if prefetched_odds is None:
+        prefetched_odds = preload_odds_for_entries(entries, data_format, bookmaker)
+
+    if process_pool is not None:
+        return list(process_pool.map(_process_entry_in_worker, entries,
+                                     _odds_per_entry(entries, data_format, bookmaker, prefetched_odds),
+                                     itertools.repeat(data_format), itertools.repeat(bookmaker),
+                                     chunksize=PROCESS_CHUNK_SIZE))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return list(executor.map(
+            lambda entry: process_batch_entry(entry[0], entry[1], data_format, bookmaker, prefetched_odds),
+            entries
+        ))
+
 # --- Main Execution ---
 if __name__ == "__main__":
     # --- Argument Parsing ---
@@ -1017,6 +1470,11 @@ if __name__ == "__main__":
                         help=f'Path to the input/output JSON file (default: {INPUT_OUTPUT_FILE})')
     parser.add_argument('--bookmaker', type=str, default=BOOKMAKER_NAME,
                         help=f'Name of the bookmaker to fetch odds for (default: {BOOKMAKER_NAME})')
+    parser.add_argument('--workers', type=int, default=BATCH_WORKERS,
+                        help=f'Number of fixtures processed concurrently (default: {BATCH_WORKERS})')
+    parser.add_argument('--processes', type=int, nargs='?', default=0, const=os.cpu_count() or 1,
+                        help='Price fixtures in this many worker processes instead of threads; '
+                             'without a value, one per CPU core (default: 0, use threads)')
     parser.add_argument('--debug', action='store_true', help='Enable debug logging')
     args = parser.parse_args()
 
@@ -1036,127 +1494,86 @@ if __name__ == "__main__":
          logger.error(f"Input file not found: {input_filepath}")
          sys.exit(1)
 
-    # --- Load the entire batch data ---
-    batch_data, data_format = load_batch_prediction_data(input_filepath)
-    if batch_data is None:
-         logger.error("Failed to load or parse batch data. Exiting.")
-         sys.exit(1)
+    # --- Load the batch data (very large files are streamed when ijson is available) ---
+    stream_input = ijson is not None and os.path.getsize(input_filepath) > STREAM_THRESHOLD_BYTES
+    if stream_input and has_non_finite_literals(input_filepath):
+        logger.info(f"{input_filepath} contains NaN/Infinity literals, which ijson cannot parse; loading it whole instead.")
+        stream_input = False
+    if stream_input:
+        data_format = detect_batch_format(input_filepath)
+        if data_format is None:
+             logger.error(f"Input file {input_filepath} does not contain a list or dictionary. Exiting.")
+             sys.exit(1)
+        logger.info(f"Streaming {data_format} batch data from {input_filepath} in chunks of {STREAM_CHUNK_SIZE} fixtures.")
+    else:
+        batch_data, data_format = load_batch_prediction_data(input_filepath)
+        if batch_data is None:
+             logger.error("Failed to load or parse batch data. Exiting.")
+             sys.exit(1)
 
     # --- Processing Loop ---
-    processed_matches = 0
-    matches_with_updates = 0
-    error_count = 0
-    if data_format == "dict": updated_data = {}
-
-    match_iterator = None
-    if data_format == "list": match_iterator = enumerate(batch_data)
-    elif data_format == "dict": match_iterator = batch_data.items()
-
-    for key_or_index, match_data in match_iterator:
-        processed_matches += 1
-        fixture_id = None
-        fixture_id_source_key = None
-
-        # --- Find Fixture ID (Revised Logic) ---
-        potential_id_paths = [
-            ['fixture_id'], ['fixtureId'], ['id'], # Common top-level keys
-            ['match_info', 'id'], # Inside 'match_info'
-            ['fixture', 'id'] # Inside 'fixture'
-        ]
-        if data_format == "list":
-            for path in potential_id_paths:
-                 temp_data = match_data
-                 found_id = True
-                 try:
-                     for key in path:
-                         temp_data = temp_data.get(key)
-                         if temp_data is None: found_id = False; break
-                     if found_id and temp_data is not None:
-                         fixture_id = temp_data
-                         logger.debug(f"Found fixture ID {fixture_id} using path {path} in list item {key_or_index+1}")
-                         break
-                 except (TypeError, KeyError):
-                     continue # Path doesn't exist or is invalid type
-
-        elif data_format == "dict":
-             fixture_id = key_or_index # Key is the primary ID
-             fixture_id_source_key = key_or_index
-             # Verify against internal ID
-             internal_id = None
-             for path in potential_id_paths:
-                 temp_data = match_data
-                 found_id = True
-                 try:
-                     for key in path:
-                         temp_data = temp_data.get(key)
-                         if temp_data is None: found_id = False; break
-                     if found_id and temp_data is not None:
-                         internal_id = temp_data
-                         break
-                 except (TypeError, KeyError):
-                     continue
-             if internal_id and str(internal_id) != str(fixture_id):
-                  logger.warning(f"Dict key '{fixture_id}' differs from internal ID '{internal_id}' found at path {path}. Using key '{fixture_id}'.")
-        # --- End Fixture ID Finding ---
-
-        display_id = f"fixture {fixture_id}" if fixture_id else f"entry {key_or_index+1 if isinstance(key_or_index, int) else key_or_index}"
-
-        if not fixture_id:
-            logger.warning(f"Skipping {display_id}: Failed to find fixture ID in expected locations.")
-            if data_format == "dict": updated_data[fixture_id_source_key] = match_data
-            error_count += 1
-            continue
-
-        logger.debug(f"\n--- Processing {display_id} ---")
-        match_date_simple = get_match_date_simple(match_data) # Use the MOST refined date finder
-        if not match_date_simple:
-            logger.warning(f"Skipping {display_id}: Could not determine valid date for odds lookup.")
-            if data_format == "dict": updated_data[fixture_id_source_key] = match_data
-            error_count += 1
-            continue
-
-        # --- Try getting odds and processing ---
-        try:
-            odds_list = get_odds_from_db(str(fixture_id), match_date_simple, bookmaker)
-
-            selections_before = json.dumps(
-                 match_data.get("match_analysis", {}).get("top_n_combined_selections") or
-                 match_data.get("top_n_combined_selections", []), default=str
-            )
-            processed_match_data = process_combined_selections(match_data, odds_list) # Modifies match_data in place
-            selections_after = json.dumps(
-                 processed_match_data.get("match_analysis", {}).get("top_n_combined_selections") or
-                 processed_match_data.get("top_n_combined_selections", []), default=str
-            )
-
-            if selections_before != selections_after:
-                 logger.info(f"Updates applied to {display_id}.") # Changed log level to INFO for updates
-                 matches_with_updates += 1
+    status_counts = collections.Counter()
+
+    def run_entries(entries, prefetched_odds=None):
+        """Processes a list of entries, tallying their statuses, and yields (key_or_index, match_data)."""
+        for key_or_index, processed_match_data, status in process_batch_entries(
+                entries, data_format, bookmaker, args.workers, process_pool, prefetched_odds):
+            status_counts[status] += 1
+            yield key_or_index, processed_match_data
+
+    def run_chunks_with_prefetch(chunks):
+        """
+        Runs chunks of entries in order while the next chunk's odds are preloaded in the
+        background, so the bulk odds query overlaps with pricing the current chunk.
+        """
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as prefetcher:
+            chunk = next(chunks, None)
+            odds_future = chunk and prefetcher.submit(preload_odds_for_entries, chunk, data_format, bookmaker)
+            while chunk:
+                next_chunk = next(chunks, None)
+                next_odds_future = next_chunk and prefetcher.submit(preload_odds_for_entries, next_chunk, data_format, bookmaker)
+                yield from run_entries(chunk, odds_future.result())
+                chunk, odds_future = next_chunk, next_odds_future
+
+    # One worker pool for the whole run (streamed chunks reuse it instead of forking a pool each)
+    process_pool = None
+    if args.processes > 0:
+        process_pool = concurrent.futures.ProcessPoolExecutor(max_workers=args.processes, initializer=_init_process_worker)
+
+    write_error_count = 0
+    try:
+        if stream_input:
+            # Parse, process and write one chunk of fixtures at a time
+            logger.info(f"Processing fixtures and writing updated data back to {input_filepath}...")
+            entry_stream = stream_batch_prediction_data(input_filepath, data_format)
+            chunks = iter(lambda: list(itertools.islice(entry_stream, STREAM_CHUNK_SIZE)), [])
+            write_batch_stream(input_filepath, data_format, run_chunks_with_prefetch(chunks))
+        else:
+            match_iterator = enumerate(batch_data) if data_format == "list" else batch_data.items()
+            processed_entries = list(run_entries(list(match_iterator)))
 
-            if data_format == "dict":
-                 updated_data[fixture_id_source_key] = processed_match_data
+            # --- Determine final data to write (worker processes return copies, so use the results) ---
+            if data_format == "list":
+                final_data_to_write = [processed_match_data for _, processed_match_data in processed_entries]
+            else:
+                final_data_to_write = dict(processed_entries)
 
-        except Exception as e:
-             logger.error(f"Unhandled error during processing loop for {display_id}: {e}")
-             import traceback
-             traceback.print_exc()
-             if data_format == "dict": updated_data[fixture_id_source_key] = match_data
-             error_count += 1
-             continue # Skip to next match on error
-
-    # --- Determine final data to write ---
-    final_data_to_write = batch_data if data_format == "list" else updated_data
-
-    # --- Serialize and Write Back ---
-    logger.info(f"Preparing to write updated data back to {input_filepath}...")
-    try:
-        serializable_data = convert_decimals_to_strings(final_data_to_write) # Convert Decimals right before writing
-        with open(input_filepath, 'w') as f:
-            json.dump(serializable_data, f, indent=4, ensure_ascii=False)
+            # --- Serialize and Write Back ---
+            logger.info(f"Preparing to write updated data back to {input_filepath}...")
+            write_json_file(input_filepath, final_data_to_write) # Decimals are formatted while encoding
         logger.info(f"Successfully updated data written back to: {input_filepath}")
     except Exception as write_error:
         logger.error(f"Error writing updated data back to {input_filepath}: {write_error}")
-        error_count += 1
+        write_error_count += 1
+    finally:
+        if process_pool is not None:
+            process_pool.shutdown()
+
+    _fetch_bookmaker_bets.cache_clear() # Odds are only reused within a single batch run
+
+    processed_matches = sum(status_counts.values())
+    matches_with_updates = status_counts["updated"]
+    error_count = status_counts["error"] + write_error_count
 
     # --- Final Summary ---
     logger.info("\n" + "="*50)
@@ -10,6 +10,7 @@ from collections import Counter, defaultdict
 import matplotlib.pyplot as plt
 from scipy.stats import poisson
 import glob # Import glob for file matching
+import heapq
 # from plotting_utils import create_combined_fixture_plot  # Plotting utils not available
 import math # Added
 from datetime import datetime, timezone # Added
@@ -32,6 +33,36 @@ except ImportError as e:
     logger.warning(f"⚠ Could not import market mapping or plotting utilities: {e}")
     MARKET_MAPPING_AVAILABLE = False
 
+# orjson is optional; fall back to the stdlib parser when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _json_loads(raw: bytes) -> Any:
+    """Parses JSON bytes with orjson when available; NaN/Infinity tokens fall back to the stdlib."""
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(raw)
+
+# NumPy types json cannot encode natively; subclasses are resolved once and cached by exact type
+_NP_CONVERTERS = {np.ndarray: np.ndarray.tolist}
+_NP_CONVERTER_BASES = ((np.integer, int), (np.floating, float), (np.ndarray, np.ndarray.tolist))
+
+class NpEncoder(json.JSONEncoder):
+    """JSON encoder for NumPy scalars and arrays, shared by the result writers."""
+    def default(self, obj):
+        convert = _NP_CONVERTERS.get(type(obj))
+        if convert is None:
+            convert = next((conv for base, conv in _NP_CONVERTER_BASES if isinstance(obj, base)), None)
+            if convert is None:
+                return super().default(obj)
+            _NP_CONVERTERS[type(obj)] = convert
+        return convert(obj)
+
 # --- Configuration ---
 MONTE_CARLO_SIMULATIONS = 80000 # Increased number of simulations
 TOP_N_SCENARIOS = 10 # Number of top scenarios to display
@@ -127,17 +158,6 @@ def process_and_save_enhanced_results(results: Dict[str, Any], output_path: str)
     
     # Save enhanced results
     try:
-        class NpEncoder(json.JSONEncoder):
-            def default(self, obj):
-                if isinstance(obj, np.integer): return int(obj)
-                if isinstance(obj, np.floating): return float(obj)
-                if isinstance(obj, np.ndarray): return obj.tolist()
-                if isinstance(obj, tuple) and any(x is None for x in obj):
-                    return [None if x is None else x for x in obj]
-                if isinstance(obj, float) and math.isnan(obj):
-                    return None
-                return super(NpEncoder, self).default(obj)
-        
         with open(output_path, 'w') as f:
             json.dump(enhanced_results, f, indent=4, cls=NpEncoder)
         logger.info(f"Saved enhanced results with market analysis to {output_path}")
@@ -166,26 +186,24 @@ def find_best_value_bets(results: Dict[str, Any]) -> List[Dict]:
                 bet_info['prob_key'] = prob_key
                 all_bets.append(bet_info)
     
-    # Sort by edge percentage descending
-    all_bets.sort(key=lambda x: x.get('edge_percent', 0), reverse=True)
-    
-    return all_bets[:20]  # Return top 20 value bets
+    # Top 20 value bets by edge percentage descending (same order as a full sort, without sorting every bet)
+    return heapq.nlargest(20, all_bets, key=lambda x: x.get('edge_percent', 0))
 
 # --- Helper Functions ---
 def safe_get(data: Dict, keys: List[str], default: Any = None) -> Any:
     """Safely traverse nested dictionary keys."""
-    if not isinstance(data, dict) or not isinstance(keys, list): return default
+    if not isinstance(data, dict) or not isinstance(keys, (list, tuple)): return default
     current = data
     for key in keys:
-        try:
-            if isinstance(current, dict): current = current.get(key)
-            elif isinstance(current, (list, tuple)) and isinstance(key, int):
-                if 0 <= key < len(current): current = current[key]
-                else: return default
+        if isinstance(current, dict):
+            try: current = current.get(key)
+            except TypeError: return default # Unhashable key
+        elif isinstance(current, (list, tuple)) and isinstance(key, int):
+            if 0 <= key < len(current): current = current[key]
             else: return default
-            if current is None: return default
-        except (TypeError, KeyError, IndexError): return default
-    return current if current is not None else default
+        else: return default
+        if current is None: return default
+    return current
 
 def parse_form_string(form_str: Optional[str], num_matches: int = 5) -> Tuple[int, int, float]:
     """Parses form string for streaks and form PPG."""
@@ -460,7 +478,7 @@ def bivariate_poisson_pmf(h: int, a: int, lambda1: float, lambda2: float, lambda
 
     except (ValueError, OverflowError) as e:
         # Fallback or warning if log calculations fail
-        logger.debug(f"Numerical issue calculating Bivariate PMF log for h={h}, a={a}, l1={lambda1}, l2={lambda2}, l3={lambda3}: {e}. Trying direct calculation (less stable).")
+        logger.debug("Numerical issue calculating Bivariate PMF log for h=%s, a=%s, l1=%s, l2=%s, l3=%s: %s. Trying direct calculation (less stable).", h, a, lambda1, lambda2, lambda3, e)
         # Attempt direct calculation as a fallback (less numerically stable)
         try:
             term1 = math.exp(-(lambda1 + lambda2 + lambda3))
@@ -717,7 +735,7 @@ def calculate_weighted_strength_lambdas(fixture_data: Dict, decay_per_day: float
                 matches_considered += 1
 
             except (ValueError, TypeError, KeyError) as e:
-                logger.debug(f"Skipping match in weighted calc due to error: {e} - Match: {match}")
+                logger.debug("Skipping match in weighted calc due to error: %s - Match: %s", e, match)
                 continue
 
         if matches_considered == 0:
@@ -1030,7 +1048,7 @@ def get_selection_concept(selection_key: str) -> Optional[Tuple]:
         h, a = map(int, score_match.groups())
         return ("score", h, a)
 
-    logger.debug(f"Unrecognized selection key format for concept mapping: {selection_key}")
+    logger.debug("Unrecognized selection key format for concept mapping: %s", selection_key)
     return None
 
 # --- NEW: Function to Reconstruct Display Key ---
@@ -1200,8 +1218,8 @@ def process_fixture_json(json_file_path: str) -> Optional[Dict[str, Any]]:
     """Loads, processes, predicts, ranks, and plots for a single fixture JSON file."""
     logger.info(f"--- Processing Fixture File: {os.path.basename(json_file_path)} ---")
     try:
-        with open(json_file_path, 'r') as f:
-            fixture_data = json.load(f)
+        with open(json_file_path, 'rb') as f:
+            fixture_data = _json_loads(f.read())
         fixture_id = fixture_data.get("fixture_id", "N/A")
         home_team_name = safe_get(fixture_data, ['raw_data', 'home', 'basic_info', 'name'], 'Home')
         away_team_name = safe_get(fixture_data, ['raw_data', 'away', 'basic_info', 'name'], 'Away')
@@ -1490,19 +1508,6 @@ if __name__ == '__main__':
     output_filename = os.path.join(OUTPUT_DIR, "batch_prediction_results.json")
     try:
         # Use a custom encoder to handle potential numpy types if necessary
-        class NpEncoder(json.JSONEncoder):
-            def default(self, obj):
-                if isinstance(obj, np.integer): return int(obj)
-                if isinstance(obj, np.floating): return float(obj)
-                if isinstance(obj, np.ndarray): return obj.tolist()
-                # Handle tuples with None, converting None to None for JSON compatibility
-                if isinstance(obj, tuple) and any(x is None for x in obj):
-                    return [None if x is None else x for x in obj]
-                # Handle NaN floats explicitly
-                if isinstance(obj, float) and math.isnan(obj):
-                    return None # Represent NaN as null in JSON
-                return super(NpEncoder, self).default(obj)
-
         with open(output_filename, 'w') as f:
             json.dump(all_results, f, indent=4, cls=NpEncoder)
         logger.info(f"Saved detailed results to {output_filename}")
@@ -355,8 +355,9 @@ class CompletePipelineTester:
             logger.error(f"❌ Complete pipeline test failed: {e}", exc_info=True)
         
         finally:
-            # Close database connection
+            # Close database connections
             try:
+                self.data_preparer.close()
                 self.db_manager.close_connection()
                 logger.info("Database connection closed")
             except: